@@ -9,3 +9,4 @@ class ApibankappConfig(AppConfig):
 
     def ready(self):
         import apibankapp.initdata
+        import apibankapp.signals
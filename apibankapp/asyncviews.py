@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import functools
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from django.http import HttpResponse
+from .models import AccountModel, OperationModel
+from .paginations import CustomKeysetPagination
+from .views import AccountViewSet, LogViewSet
+
+
+def render_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type="application/json")
+
+
+class AsyncViewClass:
+
+    def __init__(self, viewset_class, action, **initkwargs):
+        self.viewset_class = viewset_class
+        self.action = action
+        self.initkwargs = initkwargs
+
+    # Authentication, permissions and throttling of viewset are reused, only database reads are asynchronous
+    def __call__(self, function):
+        @functools.wraps(function)
+        async def wrapper(request, **kwargs):
+            view = self.viewset_class(action=self.action, action_map={"get": self.action}, args=(), kwargs=kwargs, format_kwarg=None, headers={}, **self.initkwargs)
+            view.request = view.initialize_request(request, **kwargs)
+            try:
+                await sync_to_async(view.initial)(view.request, **kwargs)
+                return await function(view, **kwargs)
+            except APIException as exc:
+                data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+                response = render_response(data, status_code=exc.status_code)
+                authenticate_header = view.get_authenticate_header(view.request)
+                if response.status_code == status.HTTP_401_UNAUTHORIZED and authenticate_header:
+                    response["WWW-Authenticate"] = authenticate_header
+                return response
+        return wrapper
+
+
+async def get_fast_page(view, queryset):
+    fast_serializer = view.fast_read_actions[view.action]
+    page = await view.paginator.apaginate_queryset(fast_serializer.get_queryset(queryset), view.request, view=view)
+    return view.get_paginated_response(fast_serializer.to_representation(page, view.get_serializer_context()))
+
+
+@AsyncViewClass(AccountViewSet, "retrieve")
+async def account_retrieve(view, pk):
+    fast_serializer = view.fast_read_actions["list"]
+    queryset = view.filter_queryset(view.get_queryset()).filter(pk=pk)
+    row = await fast_serializer.get_queryset(queryset).afirst()
+    if row is None:
+        raise NotFound(f"No {AccountModel._meta.object_name} matches the given query.")
+    return render_response(fast_serializer.to_representation([row], view.get_serializer_context())[0])
+
+
+@AsyncViewClass(AccountViewSet, "operations", pagination_class=CustomKeysetPagination)
+async def account_operations(view, pk):
+    if not await view.filter_queryset(view.get_queryset()).filter(pk=pk).aexists():
+        raise NotFound(f"No {AccountModel._meta.object_name} matches the given query.")
+    queryset = OperationModel.objects.filter(id_account=pk).order_by("-operation_date")
+    return await get_fast_page(view, view.filter_queryset(queryset))
+
+
+@AsyncViewClass(LogViewSet, "list")
+async def log_list(view):
+    return await get_fast_page(view, view.filter_queryset(view.get_queryset()))
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import time
+import random
+import datetime
+import platform
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+import django
+from rest_framework.authtoken.models import Token
+from django.contrib.auth.models import User
+from django.db import connection, close_old_connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .models import CustomerModel, AccountModel, AccountTypeModel, ParameterModel, OperationModel
+from .functions import BULK_BATCH_SIZE
+from .initdata import parameter_to_be_created
+
+
+BENCHMARK_USER = "benchmark_user"
+BENCHMARK_PASSWORD = "pass100@benchmark"
+BENCHMARK_SCENARIOS = [
+                        "login",
+                        "customer_list",
+                        "customer_retrieve",
+                        "account_list",
+                        "account_retrieve",
+                        "operations",
+                        "newoperation",
+                        "export",
+                        "interest"]
+# Counting interest locks all accounts, so it is run fewer times than other scenarios
+BENCHMARK_REQUESTS_LIMIT = {"interest": 3}
+BENCHMARK_WRITE_SCENARIOS = ["newoperation", "interest"]
+
+
+def get_percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def seed_benchmark_data(customers, accounts, operations, seed):
+    generator = random.Random(seed)
+    ParameterModel.objects.get_or_create(**parameter_to_be_created)
+    account_type = AccountTypeModel.objects.create(code="B-01", description="Benchmark account", subaccount="994500", percent=Decimal("7.35"))
+    CustomerModel.objects.bulk_create([
+                                        CustomerModel(
+                                                        first_name="John", last_name=f"Walker{number}", street="GreenWood", house="1",
+                                                        postal_code="45-200", city="Los Angeles", pesel=f"{10000000000 + number}",
+                                                        birth_date=datetime.date(1989, 7, 12), birth_city="New York", identification=f"ABX{number:06d}")
+                                        for number in range(customers)], batch_size=BULK_BATCH_SIZE)
+    id_customers = list(CustomerModel.objects.values_list("id_customer", flat=True))
+    AccountModel.objects.bulk_create([
+                                        AccountModel(
+                                                        balance=Decimal(1000), debit=Decimal(0), free_balance=Decimal(1000),
+                                                        percent=Decimal(number % 2), account_type=account_type,
+                                                        customer_id=generator.choice(id_customers))
+                                        for number in range(accounts)], batch_size=BULK_BATCH_SIZE)
+    id_accounts = list(AccountModel.objects.values_list("id_account", flat=True))
+    OperationModel.objects.bulk_create([
+                                        OperationModel(
+                                                        type_operation=1, value_operation=Decimal(1), balance_after_operation=Decimal(number),
+                                                        operation_employee=BENCHMARK_USER, id_account_id=generator.choice(id_accounts))
+                                        for number in range(operations)], batch_size=BULK_BATCH_SIZE)
+    user = User.objects.create_superuser(username=BENCHMARK_USER, password=BENCHMARK_PASSWORD)
+    token, _ = Token.objects.get_or_create(user=user)
+    return {"customers": id_customers, "accounts": id_accounts, "token": token.key}
+
+
+class BenchmarkClass:
+
+    def __init__(self, customers=100, accounts=1000, operations=10000, requests=100, concurrency=4, scenarios=None, seed=0):
+        self.customers = customers
+        self.accounts = accounts
+        self.operations = operations
+        self.requests = requests
+        self.concurrency = concurrency
+        self.scenarios = scenarios or BENCHMARK_SCENARIOS
+        self.seed = seed
+        self.local = threading.local()
+
+    def get_client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = Client(HTTP_AUTHORIZATION=f"Token {self.data['token']}")
+            self.local.anonymous_client = Client()
+        return self.local.client
+
+    def get_request(self, scenario, generator):
+        id_account = generator.choice(self.data["accounts"])
+        id_customer = generator.choice(self.data["customers"])
+        match scenario:
+            case "login":
+                return "post", reverse("login"), {"username": BENCHMARK_USER, "password": BENCHMARK_PASSWORD}
+            case "customer_list":
+                return "get", reverse("customers-list"), {"limit": 20, "offset": generator.randrange(max(len(self.data["customers"]) - 20, 1))}
+            case "customer_retrieve":
+                return "get", reverse("customers-detail", kwargs={"pk": id_customer}), None
+            case "account_list":
+                return "get", reverse("accounts-list"), {"limit": 20, "offset": generator.randrange(max(len(self.data["accounts"]) - 20, 1))}
+            case "account_retrieve":
+                return "get", reverse("accounts-detail", kwargs={"pk": id_account}), None
+            case "operations":
+                return "get", reverse("accounts-detail", kwargs={"pk": id_account}) + "operations/", {"limit": 20}
+            case "newoperation":
+                return "post", reverse("accounts-detail", kwargs={"pk": id_account}) + "newoperation/", {"type_operation": 1, "value_operation": "10.00"}
+            case "export":
+                return "get", reverse("accounts-detail", kwargs={"pk": id_account}) + "export/", {"file_format": "csv"}
+            case "interest":
+                return "post", reverse("accounts-list") + "interest/", None
+
+    def send(self, scenario, number):
+        generator = random.Random(f"{self.seed}:{scenario}:{number}")
+        client = self.get_client()
+        method, path, data = self.get_request(scenario, generator)
+        if scenario == "login":
+            client = self.local.anonymous_client
+        try:
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                if method == "post":
+                    response = client.post(path, data=data, content_type="application/json")
+                else:
+                    response = client.get(path, data=data)
+                # Streamed responses are measured until the last chunk is read
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                duration = time.perf_counter() - start
+            return duration, len(context.captured_queries), response.status_code < 400
+        finally:
+            close_old_connections()
+
+    def run_scenario(self, scenario):
+        requests = min(self.requests, BENCHMARK_REQUESTS_LIMIT.get(scenario, self.requests))
+        # SQLite can not upgrade concurrent read transactions to write, so writes are sent one by one
+        concurrency = self.concurrency
+        if connection.vendor == "sqlite" and scenario in BENCHMARK_WRITE_SCENARIOS:
+            concurrency = 1
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda number: self.send(scenario, number), range(requests)))
+        duration = time.perf_counter() - start
+        latencies = [result[0] * 1000 for result in results]
+        queries = [result[1] for result in results]
+        return {
+                "requests": requests,
+                "concurrency": concurrency,
+                "errors": len([result for result in results if not result[2]]),
+                "duration": round(duration, 4),
+                "throughput": round(requests / duration, 2) if duration else None,
+                "latency_ms": {
+                                "p50": round(get_percentile(latencies, 50), 3),
+                                "p95": round(get_percentile(latencies, 95), 3),
+                                "p99": round(get_percentile(latencies, 99), 3),
+                                "mean": round(sum(latencies) / len(latencies), 3),
+                                "max": round(max(latencies), 3)},
+                "queries": {
+                                "mean": round(sum(queries) / len(queries), 2),
+                                "max": max(queries)}}
+
+    def run(self, stdout=None):
+        start = time.perf_counter()
+        self.data = seed_benchmark_data(self.customers, self.accounts, self.operations, self.seed)
+        seed_duration = time.perf_counter() - start
+        report = {
+                    "meta": {
+                                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                                "python": platform.python_version(),
+                                "django": django.get_version(),
+                                "database": connection.vendor,
+                                "customers": self.customers,
+                                "accounts": self.accounts,
+                                "operations": self.operations,
+                                "requests": self.requests,
+                                "concurrency": self.concurrency,
+                                "seed": self.seed,
+                                "seed_duration": round(seed_duration, 4)},
+                    "scenarios": dict()}
+        for scenario in self.scenarios:
+            report["scenarios"][scenario] = self.run_scenario(scenario)
+            if stdout is not None:
+                result = report["scenarios"][scenario]
+                stdout.write(
+                                f"  {scenario}: {result['throughput']} req/s, "
+                                f"p50 {result['latency_ms']['p50']} ms, p95 {result['latency_ms']['p95']} ms, p99 {result['latency_ms']['p99']} ms, "
+                                f"{result['queries']['mean']} queries, {result['errors']} error(s)")
+        return report
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import CustomerModel, AccountModel, AccountTypeModel, ParameterModel
+
+
+def get_versions(keys):
+    # Random version instead of counter, so evicted key never brings back old entries
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    cache.set(key, uuid4().hex, timeout=None)
+
+
+# Cache is invalidated at once and again after commit, so no worker keeps data read before commit
+def invalidate(*caches):
+    for cache_class in caches:
+        cache_class.invalidate()
+        transaction.on_commit(cache_class.invalidate)
+
+
+class ReferenceCacheClass:
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f"reference:{model._meta.label_lower}:version"
+        self.version = None
+        self.data = dict()
+        self.lock = threading.Lock()
+
+    def get_version(self):
+        return get_versions([self.version_key])[0]
+
+    def load(self):
+        version = self.get_version()
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.data = {instance.pk: instance for instance in self.model.objects.all()}
+                    self.version = version
+        return self.data
+
+    def get(self, pk):
+        return self.load().get(pk)
+
+    def first(self):
+        return next(iter(self.load().values()), None)
+
+    def invalidate(self):
+        bump_version(self.version_key)
+
+
+class ObjectCacheClass:
+
+    def __init__(self, model, depends_on=()):
+        self.label = model._meta.label_lower
+        self.version_key = f"response:{self.label}:version"
+        self.depends_on = depends_on
+
+    def get_key(self, request, pk=None):
+        keys = [self.version_key] + [response_cache.version_key for response_cache in self.depends_on]
+        versions = ".".join(get_versions(keys))
+        path = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()
+        return f"response:{self.label}:{pk or 'list'}:{versions}:{path}"
+
+    def get(self, key):
+        return cache.get(key)
+
+    def set(self, key, value):
+        cache.set(key, value, timeout=settings.RESPONSE_CACHE_SECONDS)
+
+    def invalidate(self):
+        bump_version(self.version_key)
+
+
+parameter_cache = ReferenceCacheClass(ParameterModel)
+account_type_cache = ReferenceCacheClass(AccountTypeModel)
+
+customer_response_cache = ObjectCacheClass(CustomerModel)
+account_type_response_cache = ObjectCacheClass(AccountTypeModel)
+account_response_cache = ObjectCacheClass(AccountModel, depends_on=(customer_response_cache, account_type_response_cache))
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
 
 import json
+import hashlib
 from time import time
 from functools import wraps
-from .serializers import LogMonitoringSerializer
+from rest_framework.response import Response
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .monitoring import log_writer
+from .metrics import QueryTracerClass
 
 
 class ActivityMonitoringClass:
@@ -22,23 +30,76 @@ class ActivityMonitoringClass:
             start_time = time()
             action = original_function.__name__
             function = request.__class__.__name__
-            result = original_function(request, *args, **kwargs)
-            if result.status_code in [200, 201]:
-                end_time = time()
-                duration = round(end_time - start_time, 6)
-                status_log = "Success"
-            else:
-                duration = 0
-                status_log = "Failed"
+            tracer = QueryTracerClass(settings.SQL_TRACING["SLOW_QUERY_SECONDS"], settings.SQL_TRACING["SLOW_QUERIES_LIMIT"])
+            with connection.execute_wrapper(tracer):
+                result = original_function(request, *args, **kwargs)
+            # Failed calls are measured too, slow failures should be visible
+            duration = round(time() - start_time, 6)
+            status_log = "Success" if result.status_code in [200, 201] else "Failed"
             data = {
                     "action_log": action,
                     "function_log": function,
                     "duration_log": duration,
                     "data_log": data_log[:250],
                     "user_log": user_log,
-                    "status_log": status_log}
-            serializer = LogMonitoringSerializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+                    "status_log": status_log,
+                    "queries_log": tracer.queries,
+                    "db_duration_log": round(tracer.duration, 6),
+                    "slow_queries_log": tracer.slow}
+            log_writer.write(data)
             return result    
         return wrapper
+
+
+class ResponseCacheClass:
+
+    def __init__(self, response_cache):
+        self.response_cache = response_cache
+
+    def __call__(self, original_function):
+
+        @wraps(original_function)
+        def wrapper(request, *args, **kwargs):
+            key = self.response_cache.get_key(request.request, kwargs.get("pk"))
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                kind, payload = cached
+                if kind == "data":
+                    return Response(data=payload)
+                return HttpResponse(payload, content_type="application/json")
+            result = original_function(request, *args, **kwargs)
+            if result.status_code == 200 and not result.streaming:
+                if isinstance(result, Response):
+                    self.response_cache.set(key, ("data", result.data))
+                else:
+                    self.response_cache.set(key, ("content", result.content))
+            return result
+        return wrapper
+
+
+class ConditionalGetClass:
+
+    def __init__(self, get_version):
+        self.get_version = get_version
+
+    def __call__(self, original_function):
+
+        @wraps(original_function)
+        def wrapper(request, *args, **kwargs):
+            version = self.get_version(kwargs.get("pk"))
+            if version is None:
+                return original_function(request, *args, **kwargs)
+            tag, last_modified = version
+            # Representation depends on query string too (filters, pagination links)
+            source = f"{tag}:{request.request.get_full_path()}"
+            etag = quote_etag(hashlib.md5(source.encode("utf-8")).hexdigest())
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+            result = get_conditional_response(request.request._request, etag=etag, last_modified=last_modified)
+            if result is None:
+                result = original_function(request, *args, **kwargs)
+            if result.status_code in [200, 304]:
+                result.headers["ETag"] = etag
+                if last_modified:
+                    result.headers["Last-Modified"] = http_date(last_modified)
+            return result
+        return wrapper
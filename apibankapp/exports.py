@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+import decimal
+import datetime
+import tempfile
+from django.http import FileResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Side, PatternFill, Font, NamedStyle
+from .models import OperationModel
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ["xlsx", "csv", "ndjson"]
+EXPORT_FIELDS = [
+                    "id_operation",
+                    "type_operation",
+                    "value_operation",
+                    "balance_after_operation",
+                    "operation_date"]
+EXPORT_HEADERS = [
+                    "Id operation",
+                    "Typ of operation",
+                    "Value operation",
+                    "Balance after operation",
+                    "Operation date"]
+# Expected length of values in each column, used instead of autofit
+EXPORT_VALUE_LENGTHS = [10, 10, 15, 15, 19]
+
+
+class EchoClass:
+
+    def write(self, value):
+        return value
+
+
+def get_export_rows(queryset):
+    type_operation_display = dict(OperationModel.type_choice)
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = list(row)
+        for column_number, cell_value in enumerate(row):
+            if type(cell_value) is datetime.datetime:
+                row[column_number] = cell_value.replace(tzinfo=None).strftime('%d.%m.%Y %H:%M:%S')
+        row[1] = type_operation_display.get(row[1], row[1])
+        yield row
+
+
+def export_xlsx(queryset, file_name):
+    side = Side(style="dashed", color="FF000000")
+    border_around = Border(left=side, right=side, top=side, bottom=side)
+    workbook = Workbook(write_only=True)
+    workbook.add_named_style(NamedStyle(
+                                        name="header",
+                                        font=Font(bold=True, italic=True),
+                                        fill=PatternFill(fgColor="0000FFFF", fill_type="solid"),
+                                        border=border_around))
+    workbook.add_named_style(NamedStyle(name="text", border=border_around))
+    workbook.add_named_style(NamedStyle(name="amount", border=border_around, number_format="#,##0.00"))
+    worksheet = workbook.create_sheet("Operations")
+    # Column width has to be set before first row is written
+    for column_number, column_title in enumerate(EXPORT_HEADERS):
+        column_letter = chr(ord("A") + column_number)
+        worksheet.column_dimensions[column_letter].width = (max(len(column_title), EXPORT_VALUE_LENGTHS[column_number]) + 2) * 1.1
+    # Column headers
+    cells = list()
+    for column_title in EXPORT_HEADERS:
+        cell = WriteOnlyCell(worksheet, value=column_title)
+        cell.style = "header"
+        cells.append(cell)
+    worksheet.append(cells)
+    # Cell data
+    for row in get_export_rows(queryset):
+        cells = list()
+        for cell_value in row:
+            cell = WriteOnlyCell(worksheet, value=cell_value)
+            cell.style = "amount" if type(cell_value) is decimal.Decimal else "text"
+            cells.append(cell)
+        worksheet.append(cells)
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+    return FileResponse(file, as_attachment=True, filename=file_name, content_type="application/vnd.ms-excel")
+
+
+def export_csv(queryset, file_name):
+    writer = csv.writer(EchoClass())
+
+    def stream():
+        yield writer.writerow(EXPORT_HEADERS)
+        for row in get_export_rows(queryset):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type="text/csv")
+    response["Content-Disposition"] = f"attachment; filename={file_name}"
+    return response
+
+
+def export_ndjson(queryset, file_name):
+
+    def stream():
+        for row in get_export_rows(queryset):
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+    response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+    response["Content-Disposition"] = f"attachment; filename={file_name}"
+    return response
+
+
+def export_operations(queryset, file_format):
+    file_name = f"History_operations.{file_format}"
+    match file_format:
+        case "csv":
+            return export_csv(queryset, file_name)
+        case "ndjson":
+            return export_ndjson(queryset, file_name)
+        case _:
+            return export_xlsx(queryset, file_name)
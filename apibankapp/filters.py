@@ -1,10 +1,27 @@
 # -*- coding: utf-8 -*-
 
+import datetime
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
 from django_filters.rest_framework import FilterSet, CharFilter, DateFilter, NumberFilter
 
 
+class DayFilter(DateFilter):
+
+    # Comparing with day boundaries instead of casting column to date keeps index usable
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        start = timezone.make_aware(datetime.datetime.combine(value, datetime.time.min))
+        end = start + datetime.timedelta(days=1)
+        return self.get_method(qs)(**{f"{self.field_name}__gte": start, f"{self.field_name}__lt": end})
+
+
 class CustomerFilter(FilterSet):
     last_name = CharFilter(field_name="last_name", lookup_expr="icontains")
+    # Exact lookups are served by UPPER() expression indexes, search keeps matching parts of values
+    pesel = CharFilter(field_name="pesel", lookup_expr="iexact")
+    identification = CharFilter(field_name="identification", lookup_expr="iexact")
 
 
 class AccountFilter(FilterSet):
@@ -18,10 +35,10 @@ class AccountTypeFilter(FilterSet):
 class OperationFilter(FilterSet):
     type_operation = NumberFilter(field_name="type_operation")
     value_operation = NumberFilter(field_name="value_operation")
-    operation_date = DateFilter(field_name="operation_date", lookup_expr="date__iexact")
+    operation_date = DayFilter(field_name="operation_date")
 
 
 class LogFilter(FilterSet):
-    date_log = DateFilter(field_name="date_log", lookup_expr="date__iexact")
+    date_log = DayFilter(field_name="date_log")
     user_log = CharFilter(field_name="user_log", lookup_expr="icontains")
     status_log = CharFilter(field_name="status_log", lookup_expr="istartswith")
@@ -1,8 +1,27 @@
 # -*- coding: utf-8 -*-
 
 import json
-from .serializers import LogMonitoringSerializer
-from .models import AccountModel
+import logging
+import datetime
+from time import perf_counter
+from decimal import Decimal
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import F, Q, Aggregate, Count, FloatField, Max, Min, Sum, Value
+from django.db.models.functions import Round, TruncDate, TruncHour
+from django.utils import timezone
+from .caches import invalidate, parameter_cache, account_response_cache
+from .monitoring import log_writer
+from .models import CustomerModel, AccountModel, OperationModel, BalanceSnapshotModel, LogModel, LogRollupModel
+from .validators import validator_free_balance
+
+BULK_BATCH_SIZE = 1000
+INTEREST_CHUNK_SIZE = 500
+# Upper bounds (seconds) of duration histogram kept in hourly rollups of logs
+LOG_DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+LOG_STATS_PERCENTILES = [50, 95, 99]
+
+logger = logging.getLogger(__name__)
 
 
 class RegisterErrorClass:
@@ -20,9 +39,33 @@ class RegisterErrorClass:
                 "data_log": data_log[:250],
                 "user_log": user_log,
                 "status_log": status_log}
-        serializer = LogMonitoringSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        log_writer.write(data)
+
+
+def get_customer_version(id_customer):
+    updated_date = CustomerModel.objects.filter(id_customer=id_customer).values_list("updated_date", flat=True).first()
+    if updated_date is None:
+        return None
+    return updated_date, updated_date
+
+
+def get_account_version(id_account):
+    # Account representation contains customer and account type
+    version = (
+                AccountModel.objects
+                .filter(id_account=id_account)
+                .values_list("updated_date", "customer__updated_date", "account_type__updated_date")
+                .first())
+    if version is None:
+        return None
+    return version, max(version)
+
+
+def get_operations_version(id_account):
+    version = OperationModel.objects.filter(id_account=id_account).aggregate(
+                                                                                id_operation=Max("id_operation"),
+                                                                                operation_date=Max("operation_date"))
+    return version["id_operation"], version["operation_date"]
 
 
 def generate_iban(country_code, bank_number, subaccount, account, customer):
@@ -33,7 +76,400 @@ def generate_iban(country_code, bank_number, subaccount, account, customer):
     return str(iban)
 
 
-def get_balance_and_debit(id_account):
-    balance = AccountModel.objects.get(id_account=id_account).balance
-    debit = AccountModel.objects.get(id_account=id_account).debit
-    return balance, debit
+def save_snapshots(balances, snapshot_date=None):
+    # Closing balance of the day is overwritten by every later operation
+    snapshot_date = snapshot_date or timezone.localdate()
+    BalanceSnapshotModel.objects.bulk_create(
+                                                [
+                                                    BalanceSnapshotModel(id_account_id=id_account, snapshot_date=snapshot_date, balance=balance)
+                                                    for id_account, balance in balances.items()],
+                                                update_conflicts=True,
+                                                unique_fields=["id_account", "snapshot_date"],
+                                                update_fields=["balance"],
+                                                batch_size=BULK_BATCH_SIZE)
+
+
+def get_balance_as_of(id_account, balance_date):
+    snapshot = (
+                BalanceSnapshotModel.objects
+                .filter(id_account=id_account, snapshot_date__lte=balance_date)
+                .order_by("-snapshot_date")
+                .values_list("balance", flat=True)
+                .first())
+    return snapshot if snapshot is not None else Decimal("0.00")
+
+
+def get_balance_series(id_account, date_from, date_to):
+    balance = get_balance_as_of(id_account, date_from - datetime.timedelta(days=1))
+    snapshots = dict(
+                        BalanceSnapshotModel.objects
+                        .filter(id_account=id_account, snapshot_date__gte=date_from, snapshot_date__lte=date_to)
+                        .values_list("snapshot_date", "balance"))
+    series = list()
+    balance_date = date_from
+    while balance_date <= date_to:
+        balance = snapshots.get(balance_date, balance)
+        series.append({"date": balance_date, "balance": balance})
+        balance_date += datetime.timedelta(days=1)
+    return series
+
+
+def rebuild_snapshots(id_accounts):
+    last_operations = (
+                        OperationModel.objects
+                        .filter(id_account__in=id_accounts)
+                        .annotate(snapshot_date=TruncDate("operation_date"))
+                        .values("id_account", "snapshot_date")
+                        .annotate(id_operation_last=Max("id_operation"))
+                        .values_list("id_operation_last", flat=True))
+    snapshots = [
+                    BalanceSnapshotModel(id_account_id=id_account, snapshot_date=snapshot_date, balance=balance)
+                    for id_account, snapshot_date, balance in (
+                        OperationModel.objects
+                        .filter(id_operation__in=last_operations)
+                        .annotate(snapshot_date=TruncDate("operation_date"))
+                        .values_list("id_account", "snapshot_date", "balance_after_operation"))]
+    with transaction.atomic():
+        BalanceSnapshotModel.objects.filter(id_account__in=id_accounts).delete()
+        BalanceSnapshotModel.objects.bulk_create(snapshots, batch_size=BULK_BATCH_SIZE)
+    return len(snapshots)
+
+
+def post_operation(id_account, type_operation, value_operation, operation_employee):
+    # Withdrawal is stored as negative value
+    if type_operation == 2:
+        value_operation *= (-1)
+    with transaction.atomic():
+        # Locking account row until the end of transaction
+        account = AccountModel.objects.select_for_update().get(id_account=id_account)
+        account.balance += value_operation
+        account.free_balance = account.balance + account.debit
+        validator_free_balance(account.free_balance)
+        account.save(update_fields=["balance", "free_balance", "updated_date"])
+        operation = OperationModel.objects.create(
+                                                    type_operation=type_operation,
+                                                    value_operation=value_operation,
+                                                    balance_after_operation=account.balance,
+                                                    operation_employee=operation_employee,
+                                                    id_account=account)
+        save_snapshots({account.id_account: account.balance})
+    return account, operation
+
+
+def get_balance_limit():
+    # Largest absolute value which fits DecimalField of balance
+    field = AccountModel._meta.get_field("balance")
+    return Decimal(10) ** (field.max_digits - field.decimal_places)
+
+
+def post_bulk_operations(operations, operation_employee):
+    results = dict()
+    balance_limit = get_balance_limit()
+    operations_by_account = defaultdict(list)
+    for index, id_account, type_operation, value_operation in operations:
+        # Withdrawal is stored as negative value
+        if type_operation == 2:
+            value_operation *= (-1)
+        operations_by_account[id_account].append((index, type_operation, value_operation))
+    with transaction.atomic():
+        # Locking every affected account once, always in the same order
+        accounts = AccountModel.objects.select_for_update().order_by("id_account").in_bulk(sorted(operations_by_account))
+        updated_date = timezone.now()
+        accounts_changed = list()
+        operations_new = list()
+        for id_account, account_operations in sorted(operations_by_account.items()):
+            account = accounts.get(id_account)
+            if account is None:
+                for index, _, _ in account_operations:
+                    results[index] = {"index": index, "account": id_account, "status": "Failed", "error": {"message": "Account does not exist."}}
+                continue
+            changed = False
+            for index, type_operation, value_operation in account_operations:
+                balance_after_operation = account.balance + value_operation
+                if balance_after_operation + account.debit < 0:
+                    results[index] = {"index": index, "account": id_account, "status": "Failed", "error": {"message": "Free balance out of limit!"}}
+                    continue
+                if abs(balance_after_operation) >= balance_limit or abs(balance_after_operation + account.debit) >= balance_limit:
+                    results[index] = {"index": index, "account": id_account, "status": "Failed", "error": {"message": "Balance out of range!"}}
+                    continue
+                account.balance = balance_after_operation
+                account.free_balance = balance_after_operation + account.debit
+                account.updated_date = updated_date
+                operations_new.append(OperationModel(
+                                                        type_operation=type_operation,
+                                                        value_operation=value_operation,
+                                                        balance_after_operation=balance_after_operation,
+                                                        operation_employee=operation_employee,
+                                                        id_account=account))
+                results[index] = {"index": index, "account": id_account, "status": "Success", "balance_after_operation": balance_after_operation}
+                changed = True
+            if changed:
+                accounts_changed.append(account)
+        AccountModel.objects.bulk_update(accounts_changed, ["balance", "free_balance", "updated_date"], batch_size=BULK_BATCH_SIZE)
+        OperationModel.objects.bulk_create(operations_new, batch_size=BULK_BATCH_SIZE)
+        save_snapshots({account.id_account: account.balance for account in accounts_changed})
+        invalidate(account_response_cache)
+    return results
+
+
+def count_interest(operation_employee, interest_date=None, chunk_size=INTEREST_CHUNK_SIZE):
+    # Every account is credited once for date, chunks committed before failure are skipped when run again
+    interest_date = interest_date or timezone.localdate()
+    not_credited = Q(last_interest_date__isnull=True) | Q(last_interest_date__lt=interest_date)
+    quote_name = connection.ops.quote_name
+    account_column = lambda name: quote_name(AccountModel._meta.get_field(name).column)
+    operation_column = lambda name: quote_name(OperationModel._meta.get_field(name).column)
+    interest = Round(F("balance") * F("percent") / Value(Decimal(100)), 2)
+    interest_sql = f"ROUND({account_column('balance')} * {account_column('percent')} / 100, 2)"
+    summary = {
+                "accounts": 0,
+                "duration": 0,
+                "chunks": list()}
+    start_time = perf_counter()
+    last_id_account = 0
+    while True:
+        chunk_start_time = perf_counter()
+        with transaction.atomic():
+            # Locking next chunk of accounts to be recounted
+            id_accounts = list(
+                                AccountModel.objects.select_for_update()
+                                .filter(not_credited, id_account__gt=last_id_account, balance__gt=0, percent__gt=0)
+                                .order_by("id_account")
+                                .values_list("id_account", flat=True)[:chunk_size])
+            if not id_accounts:
+                break
+            lock_time = perf_counter()
+            # Creating interest operations from current balances
+            placeholders = ", ".join(["%s"] * len(id_accounts))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                                f"INSERT INTO {quote_name(OperationModel._meta.db_table)} "
+                                f"({operation_column('type_operation')}, {operation_column('value_operation')}, "
+                                f"{operation_column('balance_after_operation')}, {operation_column('operation_date')}, "
+                                f"{operation_column('operation_employee')}, {operation_column('id_account')}) "
+                                f"SELECT 3, {interest_sql}, {account_column('balance')} + {interest_sql}, %s, %s, {account_column('id_account')} "
+                                f"FROM {quote_name(AccountModel._meta.db_table)} "
+                                f"WHERE {account_column('id_account')} IN ({placeholders}) "
+                                f"AND ({account_column('last_interest_date')} IS NULL OR {account_column('last_interest_date')} < %s)",
+                                [
+                                    connection.ops.adapt_datetimefield_value(timezone.now()), operation_employee, *id_accounts,
+                                    connection.ops.adapt_datefield_value(interest_date)])
+            insert_time = perf_counter()
+            # Updating balance & free balance for accounts, date of interest is saved in same transaction
+            AccountModel.objects.filter(not_credited, id_account__in=id_accounts).update(
+                                                                            balance=F("balance") + interest,
+                                                                            free_balance=F("balance") + interest + F("debit"),
+                                                                            last_interest_date=interest_date,
+                                                                            updated_date=timezone.now())
+            update_time = perf_counter()
+            save_snapshots(dict(AccountModel.objects.filter(id_account__in=id_accounts).values_list("id_account", "balance")))
+            snapshot_time = perf_counter()
+            invalidate(account_response_cache)
+        chunk = {
+                    "first_account": id_accounts[0],
+                    "last_account": id_accounts[-1],
+                    "accounts": len(id_accounts),
+                    "lock_duration": round(lock_time - chunk_start_time, 6),
+                    "insert_duration": round(insert_time - lock_time, 6),
+                    "update_duration": round(update_time - insert_time, 6),
+                    "snapshot_duration": round(snapshot_time - update_time, 6),
+                    "duration": round(perf_counter() - chunk_start_time, 6)}
+        logger.info("Interest chunk %s-%s: %s account(s) in %s s.", chunk["first_account"], chunk["last_account"], chunk["accounts"], chunk["duration"])
+        summary["chunks"].append(chunk)
+        summary["accounts"] += len(id_accounts)
+        last_id_account = id_accounts[-1]
+    summary["duration"] = round(perf_counter() - start_time, 6)
+    return summary
+
+
+def generate_bulk_iban(chunk_size=BULK_BATCH_SIZE):
+    parameter = parameter_cache.first()
+    summary = {
+                "generated": 0,
+                "skipped": 0,
+                "duration": 0}
+    start_time = perf_counter()
+    last_id_account = 0
+    while True:
+        rows = list(
+                    AccountModel.objects
+                    .filter(number_iban="", id_account__gt=last_id_account)
+                    .order_by("id_account")
+                    .values_list("id_account", "customer_id", "account_type__subaccount")[:chunk_size])
+        if not rows:
+            break
+        accounts = list()
+        for id_account, id_customer, subaccount in rows:
+            iban = generate_iban(
+                                    country_code=parameter.country_code,
+                                    bank_number=parameter.bank_number,
+                                    subaccount=subaccount,
+                                    account=str(id_account),
+                                    customer=str(id_customer))
+            # Account and customer numbers too long for IBAN
+            if len(iban) != 28:
+                summary["skipped"] += 1
+                continue
+            accounts.append(AccountModel(id_account=id_account, number_iban=iban, updated_date=timezone.now()))
+        AccountModel.objects.bulk_update(accounts, ["number_iban", "updated_date"], batch_size=chunk_size)
+        summary["generated"] += len(accounts)
+        last_id_account = rows[-1][0]
+    invalidate(account_response_cache)
+    summary["duration"] = round(perf_counter() - start_time, 6)
+    return summary
+
+
+def rollup_logs(date_from, date_to):
+    aggregates = {
+                    "count": Count("id_log"),
+                    "duration_sum": Sum("duration_log"),
+                    "duration_max": Max("duration_log")}
+    for number, bound in enumerate(LOG_DURATION_BUCKETS):
+        aggregates[f"bucket_{number}"] = Count("id_log", filter=Q(duration_log__lte=Decimal(str(bound))))
+    rows = (LogModel.objects
+                .filter(date_log__gte=date_from, date_log__lt=date_to)
+                .annotate(hour=TruncHour("date_log", tzinfo=datetime.timezone.utc))
+                .values("hour", "action_log", "function_log", "status_log")
+                .annotate(**aggregates)
+                .order_by())
+    rollups = [
+                LogRollupModel(
+                                hour=row["hour"],
+                                action_log=row["action_log"],
+                                function_log=row["function_log"],
+                                status_log=row["status_log"],
+                                count=row["count"],
+                                duration_sum=row["duration_sum"],
+                                duration_max=row["duration_max"],
+                                duration_buckets=[row[f"bucket_{number}"] for number in range(len(LOG_DURATION_BUCKETS))])
+                for row in rows]
+    # Hour is counted again from all its logs, so repeated rollup only updates rows
+    LogRollupModel.objects.bulk_create(
+                                        rollups,
+                                        update_conflicts=True,
+                                        unique_fields=["hour", "action_log", "function_log", "status_log"],
+                                        update_fields=["count", "duration_sum", "duration_max", "duration_buckets"],
+                                        batch_size=BULK_BATCH_SIZE)
+    return len(rollups)
+
+
+def rollup_pending_logs():
+    # Last rolled up hour could be incomplete, so rollup starts again from it
+    date_from = LogRollupModel.objects.aggregate(hour=Max("hour"))["hour"]
+    if date_from is None:
+        date_from = LogModel.objects.order_by("date_log").values_list("date_log", flat=True).first()
+        if date_from is None:
+            return 0
+        date_from = date_from.replace(minute=0, second=0, microsecond=0)
+    date_to = timezone.now().replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+    counter = 0
+    while date_from < date_to:
+        date_next = min(date_from + datetime.timedelta(days=1), date_to)
+        counter += rollup_logs(date_from, date_next)
+        date_from = date_next
+    return counter
+
+
+class PercentileContClass(Aggregate):
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+
+def get_log_stats_row(action_log, function_log, count, errors, duration_max, percentiles):
+    return {
+            "action": action_log,
+            "function": function_log,
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0,
+            **{f"p{percent}": round(float(percentiles[percent]), 6) for percent in LOG_STATS_PERCENTILES},
+            "max": round(float(duration_max), 6)}
+
+
+def get_log_stats_exact(date_from, date_to):
+    aggregates = {
+                    "count": Count("id_log"),
+                    "errors": Count("id_log", filter=~Q(status_log="Success")),
+                    "duration_max": Max("duration_log")}
+    for percent in LOG_STATS_PERCENTILES:
+        aggregates[f"p{percent}"] = PercentileContClass("duration_log", percentile=percent / 100)
+    rows = (LogModel.objects
+                .filter(date_log__gte=date_from, date_log__lt=date_to)
+                .values("action_log", "function_log")
+                .annotate(**aggregates)
+                .order_by("function_log", "action_log"))
+    return [
+            get_log_stats_row(
+                                row["action_log"], row["function_log"], row["count"], row["errors"], row["duration_max"],
+                                {percent: row[f"p{percent}"] for percent in LOG_STATS_PERCENTILES})
+            for row in rows]
+
+
+def get_histogram_percentile(buckets, count, duration_max, percent):
+    # Linear interpolation inside bucket which contains rank, as histogram_quantile of Prometheus
+    rank = percent / 100 * count
+    lower_bound, lower_count = 0, 0
+    for bound, cumulative in zip(LOG_DURATION_BUCKETS, buckets):
+        if cumulative >= rank:
+            if cumulative == lower_count:
+                return min(bound, duration_max)
+            return min(lower_bound + (bound - lower_bound) * (rank - lower_count) / (cumulative - lower_count), duration_max)
+        lower_bound, lower_count = bound, cumulative
+    return duration_max
+
+
+def get_log_stats_histogram(date_from, date_to):
+    histograms = defaultdict(lambda: {"count": 0, "errors": 0, "duration_max": 0, "buckets": [0] * len(LOG_DURATION_BUCKETS)})
+
+    def add(row, buckets):
+        histogram = histograms[(row["action_log"], row["function_log"])]
+        histogram["count"] += row["count"]
+        histogram["errors"] += row["count"] if row["status_log"] != "Success" else 0
+        histogram["duration_max"] = max(histogram["duration_max"], float(row["duration_max"]))
+        histogram["buckets"] = [total + value for total, value in zip(histogram["buckets"], buckets)]
+
+    # Whole finished hours are read from rollups, partial hours at edges and logs after last rollup are counted directly
+    last_hour = LogRollupModel.objects.aggregate(hour=Max("hour"))["hour"]
+    rollup_from = date_from.replace(minute=0, second=0, microsecond=0)
+    if rollup_from < date_from:
+        rollup_from += datetime.timedelta(hours=1)
+    rollup_to = rollup_from
+    if last_hour is not None:
+        rollup_to = max(rollup_from, min(last_hour, date_to.replace(minute=0, second=0, microsecond=0)))
+    if rollup_to > rollup_from:
+        rollups = (LogRollupModel.objects
+                        .filter(hour__gte=rollup_from, hour__lt=rollup_to)
+                        .values("action_log", "function_log", "status_log", "count", "duration_max", "duration_buckets"))
+        for row in rollups:
+            add(row, row["duration_buckets"])
+    else:
+        rollup_from = rollup_to = date_to
+    aggregates = {
+                    "count": Count("id_log"),
+                    "duration_max": Max("duration_log")}
+    for number, bound in enumerate(LOG_DURATION_BUCKETS):
+        aggregates[f"bucket_{number}"] = Count("id_log", filter=Q(duration_log__lte=Decimal(str(bound))))
+    rows = (LogModel.objects
+                .filter(Q(date_log__gte=date_from, date_log__lt=rollup_from) | Q(date_log__gte=rollup_to, date_log__lt=date_to))
+                .values("action_log", "function_log", "status_log")
+                .annotate(**aggregates)
+                .order_by())
+    for row in rows:
+        add(row, [row[f"bucket_{number}"] for number in range(len(LOG_DURATION_BUCKETS))])
+    return [
+            get_log_stats_row(
+                                action_log, function_log, histogram["count"], histogram["errors"], histogram["duration_max"],
+                                {
+                                    percent: get_histogram_percentile(histogram["buckets"], histogram["count"], histogram["duration_max"], percent)
+                                    for percent in LOG_STATS_PERCENTILES})
+            for (action_log, function_log), histogram in sorted(histograms.items(), key=lambda item: (item[0][1], item[0][0]))]
+
+
+def get_log_stats(date_from, date_to):
+    # Logs older than retention are removed, their hours are left in rollups only
+    if connection.vendor == "postgresql":
+        oldest = LogModel.objects.aggregate(date_log=Min("date_log"))["date_log"]
+        if oldest is not None and oldest <= date_from:
+            return "exact", get_log_stats_exact(date_from, date_to)
+    return "histogram", get_log_stats_histogram(date_from, date_to)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import BaseCommand
+from apibankapp.models import AccountModel
+from apibankapp.functions import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuilds daily balance snapshots from history of operations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, nargs="*", help="Accounts to be rebuilt (all by default).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Number of accounts rebuilt in one transaction.")
+
+    def handle(self, *args, **options):
+        queryset = AccountModel.objects.order_by("id_account").values_list("id_account", flat=True)
+        if options["account"]:
+            queryset = queryset.filter(id_account__in=options["account"])
+        id_accounts = list(queryset)
+        counter = 0
+        for index in range(0, len(id_accounts), options["chunk_size"]):
+            chunk = id_accounts[index:index + options["chunk_size"]]
+            counter += rebuild_snapshots(chunk)
+            self.stdout.write(self.style.MIGRATE_LABEL(f"  Accounts {chunk[0]}-{chunk[-1]} have been rebuilt."))
+        self.stdout.write(self.style.SUCCESS(f"{counter} snapshot(s) for {len(id_accounts)} account(s) have been rebuilt."))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apibankapp.benchmark import BENCHMARK_SCENARIOS, BenchmarkClass
+
+
+class Command(BaseCommand):
+    help = "Seeds test database and measures latency, throughput and queries of API endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=100, help="Number of customers to be seeded.")
+        parser.add_argument("--accounts", type=int, default=1000, help="Number of accounts to be seeded.")
+        parser.add_argument("--operations", type=int, default=10000, help="Number of operations to be seeded.")
+        parser.add_argument("--requests", type=int, default=100, help="Number of requests sent in each scenario.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Number of threads sending requests.")
+        parser.add_argument("--scenario", nargs="*", choices=BENCHMARK_SCENARIOS, help="Scenarios to be run (all by default).")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of random data and requests.")
+        parser.add_argument("--output", default="benchmark.json", help="File of JSON report.")
+
+    def handle(self, *args, **options):
+        if options["customers"] < 1 or options["accounts"] < 1:
+            raise CommandError("At least one customer and one account have to be seeded.")
+        # Benchmark never touches configured database, test database is created and destroyed
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            benchmark = BenchmarkClass(
+                                        customers=options["customers"],
+                                        accounts=options["accounts"],
+                                        operations=options["operations"],
+                                        requests=options["requests"],
+                                        concurrency=options["concurrency"],
+                                        scenarios=options["scenario"],
+                                        seed=options["seed"])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Benchmark on {connection.vendor} database:"))
+            report = benchmark.run(stdout=self.stdout)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        with open(options["output"], "w") as file:
+            json.dump(report, file, indent=4)
+        self.stdout.write(self.style.SUCCESS(f"Report has been saved to {options['output']}."))
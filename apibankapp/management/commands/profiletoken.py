@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apibankapp.profiling import get_profiling_token
+
+
+class Command(BaseCommand):
+    help = "Prints signed value of header which turns profiling of single request on."
+
+    def handle(self, *args, **options):
+        token = get_profiling_token()
+        self.stdout.write(f"{settings.PROFILING['HEADER']}: {token}")
+        self.stdout.write(self.style.SUCCESS(
+                                                f"Header is valid for {settings.PROFILING['MAX_AGE']} second(s), "
+                                                f"profiles are saved to {settings.PROFILING['DIR']}."))
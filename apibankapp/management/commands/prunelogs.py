@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apibankapp.models import LogModel
+from apibankapp.functions import BULK_BATCH_SIZE, rollup_pending_logs
+from apibankapp.partitions import get_month_start, add_months, create_partitions, drop_partitions
+
+
+class Command(BaseCommand):
+    help = "Rolls up monitoring logs per hour, prepares next monthly partitions and removes logs older than retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=settings.LOG_RETENTION_MONTHS, help="Number of full months of logs to be kept.")
+        parser.add_argument("--ahead", type=int, default=3, help="Number of future monthly partitions to be created.")
+
+    def handle(self, *args, **options):
+        # Rollups are counted before logs are removed, so history stays available
+        rollups = rollup_pending_logs()
+        self.stdout.write(self.style.MIGRATE_LABEL(f"  {rollups} hourly rollup(s) have been counted."))
+        for name in create_partitions(options["ahead"]):
+            self.stdout.write(self.style.MIGRATE_LABEL(f"  Partition {name} has been created."))
+        cutoff = add_months(get_month_start(timezone.now()), -options["months"])
+        for name in drop_partitions(cutoff):
+            self.stdout.write(self.style.MIGRATE_LABEL(f"  Partition {name} has been dropped."))
+        # Plain table and default partition are cleaned row by row
+        counter = 0
+        while True:
+            id_logs = list(LogModel.objects.filter(date_log__lt=cutoff).values_list("id_log", flat=True)[:BULK_BATCH_SIZE])
+            if not id_logs:
+                break
+            counter += LogModel.objects.filter(id_log__in=id_logs).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{counter} log(s) older than {cutoff:%Y-%m-%d} have been deleted."))
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import glob
+import fcntl
+import time
+import uuid
+import logging
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from django.conf import settings
+from .functions import LOG_DURATION_BUCKETS
+from .monitoring import log_writer
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200]
+METRICS = {
+            "duration": ("apibank_action_duration_seconds", "Duration of API requests.", LOG_DURATION_BUCKETS),
+            "db_duration": ("apibank_action_db_duration_seconds", "Time of database queries in API requests.", LOG_DURATION_BUCKETS),
+            "queries": ("apibank_action_queries", "Number of database queries in API requests.", QUERY_BUCKETS)}
+LABELS = ["function", "action", "status"]
+METRICS_AGGREGATE_FILE = "aggregate.json"
+METRICS_LOCK_FILE = ".lock"
+LOG_WRITER_COUNTERS = {
+                        "queued": ("apibank_log_writer_queued_total", "counter", "Monitoring logs put into queue of log writer."),
+                        "written": ("apibank_log_writer_written_total", "counter", "Monitoring logs saved to database."),
+                        "dropped": ("apibank_log_writer_dropped_total", "counter", "Monitoring logs dropped because queue was full."),
+                        "failed": ("apibank_log_writer_failed_total", "counter", "Monitoring logs which could not be saved."),
+                        "pending": ("apibank_log_writer_pending", "gauge", "Monitoring logs waiting in queue.")}
+SLOW_QUERY_SQL_LENGTH = 1000
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def get_request_labels(request, status_code):
+    # Requests which were not resolved to view are skipped, unknown paths would make too many series
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = match.func
+    view_class = getattr(view, "cls", None) or getattr(view, "view_class", None)
+    function = view_class.__name__ if view_class else view.__name__
+    method = request.method.lower()
+    action = (getattr(view, "actions", None) or dict()).get(method, method)
+    return (function, action, "Success" if status_code < 400 else "Failed")
+
+
+def redact_sql(sql):
+    # Values inlined into raw statements are removed as well as parameters
+    return SQL_LITERALS.sub("?", sql)[:SLOW_QUERY_SQL_LENGTH]
+
+
+class QueryTracerClass:
+
+    def __init__(self, slow_threshold=None, slow_limit=10):
+        self.queries = 0
+        self.duration = 0.0
+        self.slow_threshold = slow_threshold
+        self.slow_limit = slow_limit
+        self.slow = list()
+
+    # Used with connection.execute_wrapper, every query of connection passes through it
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.duration += duration
+            self.queries += 1
+            if self.slow_threshold is not None and duration >= self.slow_threshold and len(self.slow) < self.slow_limit:
+                self.slow.append({
+                                    "sql": redact_sql(sql),
+                                    "params": len(params) if params else 0,
+                                    "many": many,
+                                    "duration": round(duration, 6)})
+
+
+class MetricsClass:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Every process writes its own file, name is not reused when pid is
+        self.pid = os.getpid()
+        self.file_name = f"{self.pid}-{uuid.uuid4().hex[:8]}.json"
+        self.series = dict()
+        self.flushed = time.monotonic()
+
+    def get_empty_series(self):
+        return {name: {"buckets": [0] * (len(buckets) + 1), "sum": 0.0} for name, (_, _, buckets) in METRICS.items()}
+
+    def observe(self, labels, values):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = self.get_empty_series()
+            for name, value in values.items():
+                series[name]["buckets"][bisect_left(METRICS[name][2], value)] += 1
+                series[name]["sum"] += value
+        if time.monotonic() - self.flushed >= settings.METRICS["FLUSH_INTERVAL"]:
+            self.flush()
+
+    def get_snapshot(self):
+        with self.lock:
+            series = [{"labels": list(labels), "series": json.loads(json.dumps(values))} for labels, values in self.series.items()]
+        return {"series": series, "counters": log_writer.get_counters()}
+
+    def flush(self):
+        self.flushed = time.monotonic()
+        if self.pid != os.getpid():
+            return
+        directory = settings.METRICS["DIR"]
+        path = os.path.join(directory, self.file_name)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(f"{path}.tmp", "w") as file:
+                json.dump(self.get_snapshot(), file)
+            os.replace(f"{path}.tmp", path)
+        except OSError:
+            logger.exception("Saving metrics to %s failed.", path)
+
+    def get_lock(self, mode):
+        directory = settings.METRICS["DIR"]
+        os.makedirs(directory, exist_ok=True)
+        file = open(os.path.join(directory, METRICS_LOCK_FILE), "a")
+        fcntl.flock(file, mode)
+        return file
+
+    def merge(self, paths):
+        total = dict()
+        counters = dict.fromkeys(LOG_WRITER_COUNTERS, 0)
+        for path in paths:
+            try:
+                with open(path) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for entry in snapshot["series"]:
+                series = total.setdefault(tuple(entry["labels"]), self.get_empty_series())
+                for name, values in entry["series"].items():
+                    series[name]["buckets"] = [total_count + count for total_count, count in zip(series[name]["buckets"], values["buckets"])]
+                    series[name]["sum"] += values["sum"]
+            for name, value in snapshot["counters"].items():
+                counters[name] += value
+        return total, counters
+
+    def collect(self):
+        self.flush()
+        with self.get_lock(fcntl.LOCK_SH):
+            return self.merge(glob.glob(os.path.join(settings.METRICS["DIR"], "*.json")))
+
+    # Called by gunicorn master when worker exits, files of recycled workers are folded into one aggregate
+    def retire(self, pid):
+        directory = settings.METRICS["DIR"]
+        with self.get_lock(fcntl.LOCK_EX):
+            paths = glob.glob(os.path.join(directory, f"{pid}-*.json"))
+            if not paths:
+                return
+            aggregate = os.path.join(directory, METRICS_AGGREGATE_FILE)
+            total, counters = self.merge([aggregate] + paths)
+            counters["pending"] = 0
+            with open(f"{aggregate}.tmp", "w") as file:
+                json.dump({"series": [{"labels": list(labels), "series": series} for labels, series in total.items()], "counters": counters}, file)
+            os.replace(f"{aggregate}.tmp", aggregate)
+            for path in paths:
+                os.remove(path)
+
+    def render(self):
+        total, counters = self.collect()
+        lines = list()
+        for name, (metric, kind, description) in LOG_WRITER_COUNTERS.items():
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {counters[name]}")
+        for name, (metric, description, buckets) in METRICS.items():
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, series in sorted(total.items()):
+                label_text = ",".join(f'{label}="{value}"' for label, value in zip(LABELS, labels))
+                cumulative = 0
+                for bound, count in zip(buckets + ["+Inf"], series[name]["buckets"]):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{label_text}}} {round(series[name]['sum'], 6)}")
+                lines.append(f"{metric}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsClass()
@@ -1,17 +1,31 @@
 # -*- coding: utf-8 -*-
 
+import json
+import logging
+import cProfile
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from rest_framework import status
+from django.conf import settings
+from django.db import connection
 from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from .metrics import QueryTracerClass, metrics, get_request_labels
+from .profiling import QueryTimelineClass, is_profiling_requested, save_profile
 
+slow_query_logger = logging.getLogger("apibankapp.slowqueries")
 
-class ExceptionMiddleware(object):
-    
-    def __init__(self, get_response):
-        self.get_response = get_response
 
-    def __call__(self, request):
-        response = self.get_response(request)
-        return response
+# Under ASGI queries run in thread of sync_to_async, so wrapper has to be added to connection of that thread
+def add_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def remove_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class ExceptionMiddleware(MiddlewareMixin):
 
     def process_exception(self, request, exception):
         data = {
@@ -23,3 +37,105 @@ class ExceptionMiddleware(object):
             }
         }
         return JsonResponse(data=data, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Requests without signed header pass through, profiling costs nothing for them
+        if not is_profiling_requested(request):
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        tracer = QueryTimelineClass()
+        with connection.execute_wrapper(tracer):
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+        response.headers["X-Profile-Id"] = save_profile(request, response, profile, tracer)
+        return response
+
+    # Under ASGI profile covers event loop thread, so other requests served meanwhile are included too
+    async def __acall__(self, request):
+        if not is_profiling_requested(request):
+            return await self.get_response(request)
+        profile = cProfile.Profile()
+        tracer = QueryTimelineClass()
+        await sync_to_async(add_execute_wrapper)(tracer)
+        profile.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.disable()
+            await sync_to_async(remove_execute_wrapper)(tracer)
+        response.headers["X-Profile-Id"] = save_profile(request, response, profile, tracer)
+        return response
+
+
+class QueryTracingMiddleware(MiddlewareMixin):
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tracer = QueryTracerClass(settings.SQL_TRACING["SLOW_QUERY_SECONDS"], settings.SQL_TRACING["SLOW_QUERIES_LIMIT"])
+        start = perf_counter()
+        with connection.execute_wrapper(tracer):
+            response = self.get_response(request)
+        # Exported files are read from database while response is streamed
+        if response.streaming:
+            response.streaming_content = self.trace_stream(response.streaming_content, request, response, tracer, start)
+        else:
+            self.finish(request, response, tracer, start)
+        return response
+
+    async def __acall__(self, request):
+        tracer = QueryTracerClass(settings.SQL_TRACING["SLOW_QUERY_SECONDS"], settings.SQL_TRACING["SLOW_QUERIES_LIMIT"])
+        start = perf_counter()
+        await sync_to_async(add_execute_wrapper)(tracer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_execute_wrapper)(tracer)
+        if response.streaming and response.is_async:
+            response.streaming_content = self.atrace_stream(response.streaming_content, request, response, tracer, start)
+        elif response.streaming:
+            response.streaming_content = self.trace_stream(response.streaming_content, request, response, tracer, start)
+        else:
+            self.finish(request, response, tracer, start)
+        return response
+
+    def trace_stream(self, content, request, response, tracer, start):
+        try:
+            with connection.execute_wrapper(tracer):
+                yield from content
+        finally:
+            self.finish(request, response, tracer, start)
+
+    async def atrace_stream(self, content, request, response, tracer, start):
+        await sync_to_async(add_execute_wrapper)(tracer)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await sync_to_async(remove_execute_wrapper)(tracer)
+            self.finish(request, response, tracer, start)
+
+    def finish(self, request, response, tracer, start):
+        duration = perf_counter() - start
+        labels = get_request_labels(request, response.status_code)
+        if labels is not None:
+            metrics.observe(labels, {"duration": duration, "db_duration": tracer.duration, "queries": tracer.queries})
+        if not response.streaming:
+            response.headers["Server-Timing"] = f"db;dur={tracer.duration * 1000:.3f};desc=\"{tracer.queries} queries\", total;dur={duration * 1000:.3f}"
+        if tracer.slow or duration >= settings.SQL_TRACING["SLOW_REQUEST_SECONDS"]:
+            slow_query_logger.warning(json.dumps({
+                                                    "method": request.method,
+                                                    "path": request.path,
+                                                    "status": response.status_code,
+                                                    "duration": round(duration, 6),
+                                                    "queries": tracer.queries,
+                                                    "db_duration": round(tracer.duration, 6),
+                                                    "slow_queries": tracer.slow}))
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:01
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0039_alter_customermodel_avatar'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='operationmodel',
+            name='id_account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='account_operations', to='apibankapp.accountmodel'),
+        ),
+        migrations.AddIndex(
+            model_name='accountmodel',
+            index=models.Index(condition=models.Q(('balance__gt', 0), ('percent__gt', 0)), fields=['id_account'], name='account_interest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customermodel',
+            index=models.Index(django.db.models.functions.text.Upper('pesel'), name='customer_pesel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customermodel',
+            index=models.Index(django.db.models.functions.text.Upper('identification'), name='customer_identification_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logmodel',
+            index=models.Index(fields=['-date_log', '-id_log'], name='log_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logmodel',
+            index=models.Index(fields=['-duration_log', '-id_log'], name='log_duration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationmodel',
+            index=models.Index(fields=['id_account', '-operation_date', '-id_operation'], name='operation_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0040_alter_operationmodel_id_account_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshotModel',
+            fields=[
+                ('id_snapshot', models.AutoField(primary_key=True, serialize=False)),
+                ('snapshot_date', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('id_account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='account_snapshots', to='apibankapp.accountmodel')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='balancesnapshotmodel',
+            constraint=models.UniqueConstraint(fields=('id_account', 'snapshot_date'), name='snapshot_account_date_unique'),
+        ),
+    ]
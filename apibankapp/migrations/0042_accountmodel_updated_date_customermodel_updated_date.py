@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0041_balancesnapshotmodel_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountmodel',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='customermodel',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0042_accountmodel_updated_date_customermodel_updated_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogRollupModel',
+            fields=[
+                ('id_rollup', models.AutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('action_log', models.CharField(max_length=50)),
+                ('function_log', models.CharField(max_length=50)),
+                ('status_log', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField()),
+                ('duration_sum', models.DecimalField(decimal_places=6, max_digits=18)),
+                ('duration_max', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('duration_buckets', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='logrollupmodel',
+            constraint=models.UniqueConstraint(fields=('hour', 'action_log', 'function_log', 'status_log'), name='log_rollup_hour_unique'),
+        ),
+    ]
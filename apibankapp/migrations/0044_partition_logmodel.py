@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from django.db import migrations
+
+
+# Monthly partitions are created only on PostgreSQL, other databases keep plain table
+def partition_log_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        from apibankapp.partitions import convert_to_partitioned
+        convert_to_partitioned(schema_editor)
+
+
+def unpartition_log_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        from apibankapp.partitions import convert_to_plain
+        convert_to_plain(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0043_logrollupmodel'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_log_table, unpartition_log_table),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0044_partition_logmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logmodel',
+            name='db_duration_log',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='logmodel',
+            name='queries_log',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='logmodel',
+            name='slow_queries_log',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
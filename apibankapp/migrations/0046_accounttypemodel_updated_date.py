@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0045_logmodel_query_tracing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accounttypemodel',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
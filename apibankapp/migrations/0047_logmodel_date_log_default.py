@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-18 15:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0046_accounttypemodel_updated_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logmodel',
+            name='date_log',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apibankapp', '0047_logmodel_date_log_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountmodel',
+            name='last_interest_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
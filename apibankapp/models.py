@@ -4,6 +4,9 @@ import os
 import uuid
 from decimal import Decimal
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.core.validators import RegexValidator, MinValueValidator
 from .validators import validator_free_balance, validator_number_iban, validator_file_size
 
@@ -53,6 +56,13 @@ class CustomerModel(models.Model):
                                 auto_now_add=True)
     created_employee = models.CharField(
                                 max_length=50)
+    updated_date = models.DateTimeField(
+                                auto_now=True)
+
+    class Meta:
+        indexes = [
+                    models.Index(Upper("pesel"), name="customer_pesel_idx"),
+                    models.Index(Upper("identification"), name="customer_identification_idx")]
 
     def save(self, *args, **kwargs):
         self.identification = self.identification.upper()
@@ -88,10 +98,20 @@ class AccountModel(models.Model):
                                 auto_now_add=True)
     created_employee = models.CharField(
                                 max_length=50)
+    updated_date = models.DateTimeField(
+                                auto_now=True)
+    last_interest_date = models.DateField(
+                                null=True,
+                                blank=True,
+                                editable=False)
 
     account_type = models.ForeignKey("AccountTypeModel", related_name="accounttype_accounts", on_delete=models.PROTECT)
     customer = models.ForeignKey("CustomerModel", related_name="customer_accounts", on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [
+                    models.Index(fields=["id_account"], condition=Q(balance__gt=0, percent__gt=0), name="account_interest_idx")]
+
 
 """ AccountType Model """
 class AccountTypeModel(models.Model):
@@ -111,6 +131,8 @@ class AccountTypeModel(models.Model):
                                 max_digits=4,
                                 decimal_places=2,
                                 validators=[MinValueValidator(Decimal(0))])
+    updated_date = models.DateTimeField(
+                                auto_now=True)
 
     def save(self, *args, **kwargs):
         self.code = self.code.upper()
@@ -158,7 +180,11 @@ class OperationModel(models.Model):
     operation_employee = models.CharField(
                                 max_length=50)
     
-    id_account = models.ForeignKey("AccountModel", related_name="account_operations", on_delete=models.PROTECT)
+    id_account = models.ForeignKey("AccountModel", related_name="account_operations", on_delete=models.PROTECT, db_index=False)
+
+    class Meta:
+        indexes = [
+                    models.Index(fields=["id_account", "-operation_date", "-id_operation"], name="operation_account_date_idx")]
 
 
 """ Log Model """
@@ -167,7 +193,8 @@ class LogModel(models.Model):
     id_log = models.AutoField(
                                 primary_key=True)
     date_log = models.DateTimeField(
-                                auto_now_add=True)
+                                default=timezone.now,
+                                editable=False)
     action_log = models.CharField(
                                 max_length=50)
     function_log = models.CharField(
@@ -182,3 +209,62 @@ class LogModel(models.Model):
                                 max_length=50)
     status_log = models.CharField(
                                 max_length=20)
+    queries_log = models.PositiveIntegerField(
+                                default=0)
+    db_duration_log = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=6,
+                                default=0)
+    slow_queries_log = models.JSONField(
+                                default=list,
+                                blank=True)
+
+    class Meta:
+        indexes = [
+                    models.Index(fields=["-date_log", "-id_log"], name="log_date_idx"),
+                    models.Index(fields=["-duration_log", "-id_log"], name="log_duration_idx")]
+
+
+""" Balance Snapshot Model """
+class BalanceSnapshotModel(models.Model):
+
+    id_snapshot = models.AutoField(
+                                primary_key=True)
+    snapshot_date = models.DateField()
+    balance = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=2)
+
+    id_account = models.ForeignKey("AccountModel", related_name="account_snapshots", on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=["id_account", "snapshot_date"], name="snapshot_account_date_unique")]
+
+
+""" Log Rollup Model """
+class LogRollupModel(models.Model):
+
+    id_rollup = models.AutoField(
+                                primary_key=True)
+    hour = models.DateTimeField()
+    action_log = models.CharField(
+                                max_length=50)
+    function_log = models.CharField(
+                                max_length=50)
+    status_log = models.CharField(
+                                max_length=20)
+    count = models.PositiveIntegerField()
+    duration_sum = models.DecimalField(
+                                max_digits=18,
+                                decimal_places=6)
+    duration_max = models.DecimalField(
+                                max_digits=12,
+                                decimal_places=6)
+    # Cumulative number of logs with duration up to each bound of LOG_DURATION_BUCKETS
+    duration_buckets = models.JSONField(
+                                default=list)
+
+    class Meta:
+        constraints = [
+                        models.UniqueConstraint(fields=["hour", "action_log", "function_log", "status_log"], name="log_rollup_hour_unique")]
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from .serializers import LogMonitoringSerializer
+from .models import LogModel
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriterClass:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.queue = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.counters = {
+                            "queued": 0,
+                            "written": 0,
+                            "dropped": 0,
+                            "failed": 0}
+        atexit.register(self.stop)
+
+    def count(self, counter, value=1):
+        with self.lock:
+            self.counters[counter] += value
+
+    def get_counters(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters["pending"] = self.queue.qsize() if self.queue is not None else 0
+        return counters
+
+    def write(self, data):
+        serializer = LogMonitoringSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        if not settings.LOG_MONITORING["ASYNC"]:
+            serializer.save()
+            self.count("written")
+            return
+        self.start()
+        try:
+            # Time of request is kept, batch is saved later by worker thread
+            self.queue.put_nowait(LogModel(**serializer.validated_data, date_log=timezone.now()))
+            self.count("queued")
+        except queue.Full:
+            self.count("dropped")
+
+    def start(self):
+        # Worker thread has to be created again in every forked process
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.queue = queue.Queue(maxsize=settings.LOG_MONITORING["QUEUE_SIZE"])
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.stopping.is_set():
+            batch = self.collect(timeout=settings.LOG_MONITORING["FLUSH_INTERVAL"])
+            if batch:
+                # Only background thread owns its connection, flush() and stop() run on caller's thread
+                close_old_connections()
+                self.save(batch)
+        close_old_connections()
+
+    def collect(self, timeout=None):
+        batch = list()
+        try:
+            batch.append(self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait())
+            while len(batch) < settings.LOG_MONITORING["BATCH_SIZE"]:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def save(self, batch):
+        try:
+            LogModel.objects.bulk_create(batch)
+            self.count("written", len(batch))
+        except Exception:
+            logger.exception("Saving %s monitoring log(s) failed.", len(batch))
+            self.count("failed", len(batch))
+
+    def flush(self):
+        if self.queue is None or self.pid != os.getpid():
+            return
+        while True:
+            batch = self.collect()
+            if not batch:
+                break
+            self.save(batch)
+
+    def stop(self):
+        if self.thread is not None and self.pid == os.getpid():
+            self.stopping.set()
+            self.thread.join(timeout=settings.LOG_MONITORING["FLUSH_INTERVAL"] * 2)
+        self.flush()
+        if self.counters["dropped"] or self.counters["failed"]:
+            logger.warning("Monitoring logs dropped: %s, failed: %s.", self.counters["dropped"], self.counters["failed"])
+
+
+log_writer = LogWriterClass()
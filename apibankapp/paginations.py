@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from rest_framework.pagination import LimitOffsetPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Q
 from django.http import JsonResponse
 from django.utils.translation import gettext_lazy as _
 
@@ -19,3 +24,146 @@ class CustomLimitOffsetPagination(LimitOffsetPagination):
                             "next": self.get_next_link(),
                             "previous": self.get_previous_link(),
                             "results": data})
+
+
+class CustomKeysetPagination(BasePagination):
+    page_size = 5
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    page_size_query_description = _("Number of results to return per page.")
+    cursor_query_description = _("The pagination cursor value.")
+    max_page_size = 50
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        self.count = self.count_queryset.count()
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        self.count = await self.count_queryset.acount()
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field_name, self.descending = self.get_ordering(request, queryset, view)
+        self.pk_name = queryset.model._meta.pk.name
+        self.field = queryset.model._meta.get_field(self.field_name)
+        cursor = self.decode_cursor(request)
+        # Count of all results is kept in response as in limit/offset pagination
+        self.count_queryset = queryset.order_by()
+        reverse = cursor["reverse"] if cursor else False
+        # Key (field, pk) is read backwards when moving to previous page
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field_name}", f"{prefix}{self.pk_name}")
+        if cursor:
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                                        Q(**{f"{self.field_name}__{lookup}": cursor["value"]}) |
+                                        Q(**{self.field_name: cursor["value"], f"{self.pk_name}__{lookup}": cursor["pk"]}))
+        self.cursor = cursor
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        cursor = self.cursor
+        reverse = cursor["reverse"] if cursor else False
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for filter_backend in getattr(view, "filter_backends", []):
+            if hasattr(filter_backend, "get_ordering"):
+                ordering = filter_backend().get_ordering(request, queryset, view)
+                break
+        ordering = ordering or queryset.query.order_by or ["-pk"]
+        field_name = ordering[0]
+        descending = field_name.startswith("-")
+        field_name = field_name.lstrip("-")
+        if field_name == "pk":
+            field_name = queryset.model._meta.pk.name
+        return field_name, descending
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            return {
+                    "value": self.field.to_python(cursor["v"]),
+                    "pk": int(cursor["k"]),
+                    "reverse": bool(cursor["r"])}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def encode_cursor(self, instance, reverse):
+        # Fast read path pages over rows from values() instead of model instances
+        if isinstance(instance, dict):
+            value = instance[self.field_name]
+            value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+            pk = instance[self.pk_name]
+        else:
+            value = self.field.value_to_string(instance)
+            pk = getattr(instance, self.pk_name)
+        cursor = {
+                    "v": value,
+                    "k": pk,
+                    "r": reverse}
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(",", ":")).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return JsonResponse({
+                            "count": self.count,
+                            "next": self.get_next_link(),
+                            "previous": self.get_previous_link(),
+                            "results": data})
+
+    def get_schema_operation_parameters(self, view):
+        return [
+                {
+                    "name": self.cursor_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": str(self.cursor_query_description),
+                    "schema": {"type": "string"}},
+                {
+                    "name": self.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": str(self.page_size_query_description),
+                    "schema": {"type": "integer"}}]
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+import datetime
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+LOG_TABLE = "apibankapp_logmodel"
+LOG_DEFAULT_PARTITION = f"{LOG_TABLE}_default"
+
+
+def get_month_start(value):
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def get_partition_name(month):
+    return f"{LOG_TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(cursor):
+    if connection.vendor != "postgresql":
+        return False
+    cursor.execute(
+                    "SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+                    "WHERE pg_class.relname = %s", [LOG_TABLE])
+    return cursor.fetchone() is not None
+
+
+def get_partitions(cursor):
+    cursor.execute(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = %s ORDER BY child.relname", [LOG_TABLE])
+    partitions = dict()
+    for (name,) in cursor.fetchall():
+        if name != LOG_DEFAULT_PARTITION:
+            partitions[name] = datetime.datetime.strptime(name[-6:], "%Y%m").replace(tzinfo=datetime.timezone.utc)
+    return partitions
+
+
+def get_bounds_sql(cursor, start, end):
+    # Partition bounds can not be passed as parameters of DDL, values are quoted by database driver
+    sql = cursor.mogrify("FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return sql.decode("utf-8") if isinstance(sql, bytes) else sql
+
+
+def create_partition(cursor, month):
+    quote_name = connection.ops.quote_name
+    start = get_month_start(month)
+    end = add_months(start, 1)
+    name = get_partition_name(start)
+    # Temporary table gets unique name and is dropped at once, several partitions can be created in one outer transaction
+    moved = quote_name(f"log_moved_{uuid.uuid4().hex}")
+    # Rows which got into default partition are moved, otherwise new partition could not be attached
+    with transaction.atomic():
+        cursor.execute(f"CREATE TEMPORARY TABLE {moved} (LIKE {quote_name(LOG_TABLE)})")
+        cursor.execute(
+                        f"WITH moved AS (DELETE FROM {quote_name(LOG_DEFAULT_PARTITION)} WHERE date_log >= %s AND date_log < %s RETURNING *) "
+                        f"INSERT INTO {moved} SELECT * FROM moved", [start, end])
+        cursor.execute(f"CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(LOG_TABLE)} {get_bounds_sql(cursor, start, end)}")
+        cursor.execute(f"INSERT INTO {quote_name(LOG_TABLE)} SELECT * FROM {moved}")
+        cursor.execute(f"DROP TABLE {moved}")
+    return name
+
+
+def create_partitions(months_ahead, date_from=None):
+    current = get_month_start(timezone.now())
+    month = get_month_start(date_from) if date_from else current
+    created = list()
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        partitions = get_partitions(cursor)
+        while month <= add_months(current, months_ahead):
+            if get_partition_name(month) not in partitions:
+                created.append(create_partition(cursor, month))
+            month = add_months(month, 1)
+    return created
+
+
+def drop_partitions(cutoff):
+    dropped = list()
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return dropped
+        for name, month in get_partitions(cursor).items():
+            if add_months(month, 1) <= cutoff:
+                cursor.execute(f"ALTER TABLE {connection.ops.quote_name(LOG_TABLE)} DETACH PARTITION {connection.ops.quote_name(name)}")
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+                dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(schema_editor):
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} RENAME TO {LOG_TABLE}_old")
+    cursor.execute(f"CREATE TABLE {LOG_TABLE} (LIKE {LOG_TABLE}_old INCLUDING STORAGE) PARTITION BY RANGE (date_log)")
+    cursor.execute(f"CREATE TABLE {LOG_DEFAULT_PARTITION} PARTITION OF {LOG_TABLE} DEFAULT")
+    cursor.execute(f"SELECT MIN(date_log) FROM {LOG_TABLE}_old")
+    date_from = cursor.fetchone()[0] or timezone.now()
+    current = get_month_start(timezone.now())
+    month = get_month_start(date_from)
+    while month <= add_months(current, 3):
+        cursor.execute(
+                        f"CREATE TABLE {schema_editor.quote_name(get_partition_name(month))} PARTITION OF {LOG_TABLE} "
+                        f"{get_bounds_sql(cursor, month, add_months(month, 1))}")
+        month = add_months(month, 1)
+    cursor.execute(f"INSERT INTO {LOG_TABLE} SELECT * FROM {LOG_TABLE}_old")
+    cursor.execute(f"DROP TABLE {LOG_TABLE}_old")
+    # Primary key of partitioned table has to contain partition key
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} ADD PRIMARY KEY (id_log, date_log)")
+    cursor.execute(f"CREATE INDEX log_date_idx ON {LOG_TABLE} (date_log DESC, id_log DESC)")
+    cursor.execute(f"CREATE INDEX log_duration_idx ON {LOG_TABLE} (duration_log DESC, id_log DESC)")
+    cursor.execute(f"CREATE SEQUENCE {LOG_TABLE}_id_log_seq OWNED BY {LOG_TABLE}.id_log")
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} ALTER COLUMN id_log SET DEFAULT nextval('{LOG_TABLE}_id_log_seq')")
+    cursor.execute(f"SELECT setval('{LOG_TABLE}_id_log_seq', COALESCE(MAX(id_log), 0) + 1, false) FROM {LOG_TABLE}")
+
+
+def convert_to_plain(schema_editor):
+    cursor = schema_editor.connection.cursor()
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} RENAME TO {LOG_TABLE}_old")
+    cursor.execute(f"CREATE TABLE {LOG_TABLE} (LIKE {LOG_TABLE}_old INCLUDING STORAGE)")
+    cursor.execute(f"INSERT INTO {LOG_TABLE} SELECT * FROM {LOG_TABLE}_old")
+    cursor.execute(f"DROP TABLE {LOG_TABLE}_old")
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} ADD PRIMARY KEY (id_log)")
+    cursor.execute(f"ALTER TABLE {LOG_TABLE} ALTER COLUMN id_log ADD GENERATED BY DEFAULT AS IDENTITY")
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{LOG_TABLE}', 'id_log'), COALESCE(MAX(id_log), 0) + 1, false) FROM {LOG_TABLE}")
+    cursor.execute(f"CREATE INDEX log_date_idx ON {LOG_TABLE} (date_log DESC, id_log DESC)")
+    cursor.execute(f"CREATE INDEX log_duration_idx ON {LOG_TABLE} (duration_log DESC, id_log DESC)")
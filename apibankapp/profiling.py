@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import json
+import uuid
+import pstats
+import datetime
+from time import perf_counter
+from django.conf import settings
+from django.core import signing
+from .metrics import QueryTracerClass
+
+
+PROFILING_SALT = "apibankapp.profiling"
+PROFILING_STATS_LIMIT = 40
+
+
+def get_profiling_token():
+    return signing.dumps("profile", salt=PROFILING_SALT)
+
+
+def is_profiling_requested(request):
+    value = request.headers.get(settings.PROFILING["HEADER"])
+    if not value:
+        return False
+    try:
+        return signing.loads(value, salt=PROFILING_SALT, max_age=settings.PROFILING["MAX_AGE"]) == "profile"
+    except signing.BadSignature:
+        return False
+
+
+class QueryTimelineClass(QueryTracerClass):
+
+    def __init__(self):
+        super().__init__()
+        self.start = perf_counter()
+        self.timeline = list()
+
+    # Parameters are not saved, statements are enough to find slow part of request
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            self.timeline.append({
+                                    "start": round(start - self.start, 6),
+                                    "duration": round(perf_counter() - start, 6),
+                                    "sql": sql,
+                                    "many": many})
+
+
+def save_profile(request, response, profile, tracer):
+    directory = settings.PROFILING["DIR"]
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.datetime.now(datetime.timezone.utc):%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    profile.dump_stats(os.path.join(directory, f"{name}.prof"))
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats(settings.PROFILING["SORT"]).print_stats(PROFILING_STATS_LIMIT)
+    report = {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration": round(perf_counter() - tracer.start, 6),
+                "queries": tracer.queries,
+                "db_duration": round(tracer.duration, 6),
+                "sql": tracer.timeline,
+                "stats": stream.getvalue()}
+    with open(os.path.join(directory, f"{name}.json"), "w") as file:
+        json.dump(report, file, indent=4)
+    return name
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import datetime
 from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+from django.db.models import FileField
+from django.utils import timezone
+from django.utils.encoding import force_str
 from .models import CustomerModel, ParameterModel, AccountModel, AccountTypeModel, OperationModel, LogModel
 
 
@@ -103,6 +109,19 @@ class OperationNewSerializer(serializers.ModelSerializer):
         fields = ["type_operation", "value_operation"]
 
 
+class OperationBulkSerializer(serializers.ModelSerializer):
+
+    type_choice = [
+                    (1, "Deposit"),
+                    (2, "Withdrawal")]
+    account = serializers.IntegerField()
+    type_operation = serializers.ChoiceField(choices=type_choice)
+
+    class Meta:
+        model = OperationModel
+        fields = ["account", "type_operation", "value_operation"]
+
+
 class OperationHistorySerializer(serializers.ModelSerializer):
 
     type_operation = serializers.CharField(source="get_type_operation_display")
@@ -124,6 +143,23 @@ class OperationInterestSerializer(serializers.ModelSerializer):
                     "balance_after_operation", "id_account"]
 
 
+""" Balance snapshot """
+class BalanceAsOfSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+
+
+class BalanceSeriesSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=True)
+    date_to = serializers.DateField(required=True)
+
+    def validate(self, data):
+        if data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError(detail={"message": "Date from should be earlier than date to!"}, code=400)
+        if (data["date_to"] - data["date_from"]).days >= 366:
+            raise serializers.ValidationError(detail={"message": "Period can not be longer than 366 days!"}, code=400)
+        return data
+
+
 """ Parameter """
 class ParameterSerializer(serializers.ModelSerializer):
 
@@ -138,3 +174,91 @@ class LogMonitoringSerializer(serializers.ModelSerializer):
     class Meta:
         model = LogModel
         fields = "__all__"
+
+
+class LogStatsSerializer(serializers.Serializer):
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        data["date_to"] = data.get("date_to") or timezone.now()
+        data["date_from"] = data.get("date_from") or data["date_to"] - datetime.timedelta(hours=24)
+        if data["date_from"] >= data["date_to"]:
+            raise serializers.ValidationError(detail={"message": "Date from should be earlier than date to!"}, code=400)
+        return data
+
+
+""" Fast read """
+class FastSerializerClass:
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        # Converters are compiled once, only file converters get context of request when rows are converted
+        self.columns, self.converters = self.compile(self.serializer_class().fields, model=self.serializer_class.Meta.model)
+
+    def compile(self, fields, model, prefix=""):
+        columns = list()
+        converters = list()
+        for name, field in fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if isinstance(field, serializers.BaseSerializer):
+                nested_columns, nested_converters = self.compile(field.fields, model=field.Meta.model, prefix=f"{prefix}{source}__")
+                columns += nested_columns
+                converters.append((name, None, nested_converters, False))
+            elif source.startswith("get_") and source.endswith("_display"):
+                model_field = model._meta.get_field(source[4:-8])
+                columns.append(prefix + model_field.name)
+                converters.append((name, prefix + model_field.name, self.get_display_converter(field, model_field), False))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                columns.append(prefix + source)
+                converters.append((name, prefix + source, lambda value: value, False))
+            elif isinstance(field, serializers.RelatedField) or isinstance(field, serializers.ManyRelatedField) or "." in source or source == "*":
+                raise ValueError(f"Field {name} of {self.serializer_class.__name__} can not be read from values.")
+            else:
+                model_field = model._meta.get_field(source)
+                columns.append(prefix + source)
+                if isinstance(model_field, FileField):
+                    converters.append((name, prefix + source, self.get_file_converter(field, model_field), True))
+                else:
+                    converters.append((name, prefix + source, field.to_representation, False))
+        return columns, converters
+
+    def get_display_converter(self, field, model_field):
+        choices = dict(model_field.flatchoices)
+        return lambda value: field.to_representation(force_str(choices.get(value, value), strings_only=True))
+
+    # The same as FileField.to_representation of serializer, but request is taken from context passed with rows
+    def get_file_converter(self, field, model_field):
+        use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+
+        def convert(value, context):
+            if not value:
+                return None
+            file = model_field.attr_class(None, model_field, value)
+            if not use_url:
+                return file.name
+            request = context.get("request")
+            return request.build_absolute_uri(file.url) if request is not None else file.url
+
+        return convert
+
+    def get_queryset(self, queryset):
+        return queryset.values(*self.columns)
+
+    def to_representation(self, rows, context):
+        return [self.convert(row, self.converters, context) for row in rows]
+
+    def convert(self, row, converters, context):
+        data = dict()
+        for name, column, converter, with_context in converters:
+            if column is None:
+                data[name] = self.convert(row, converter, context)
+            else:
+                value = row[column]
+                if value is None:
+                    data[name] = None
+                else:
+                    data[name] = converter(value, context) if with_context else converter(value)
+        return data
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import CustomerModel, AccountModel, AccountTypeModel, ParameterModel
+from .caches import (
+                        invalidate, parameter_cache, account_type_cache,
+                        customer_response_cache, account_response_cache, account_type_response_cache)
+
+
+@receiver([post_save, post_delete], sender=ParameterModel)
+def invalidate_parameter_cache(sender, **kwargs):
+    invalidate(parameter_cache)
+
+
+@receiver([post_save, post_delete], sender=AccountTypeModel)
+def invalidate_account_type_cache(sender, **kwargs):
+    invalidate(account_type_cache, account_type_response_cache)
+
+
+@receiver([post_save, post_delete], sender=CustomerModel)
+def invalidate_customer_cache(sender, **kwargs):
+    invalidate(customer_response_cache)
+
+
+@receiver([post_save, post_delete], sender=AccountModel)
+def invalidate_account_cache(sender, instance, created=True, **kwargs):
+    # Customer lists links to accounts, so only adding or deleting account changes it
+    if created:
+        CustomerModel.objects.filter(id_customer=instance.customer_id).update(updated_date=timezone.now())
+        invalidate(account_response_cache, customer_response_cache)
+    else:
+        invalidate(account_response_cache)
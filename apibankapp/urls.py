@@ -5,6 +5,7 @@ from django.conf.urls.static import static
 from django.conf import settings
 from rest_framework import routers
 from .views import CustomerViewSet, AccountViewSet, AccountTypeViewSet, ParameterViewSet, LogViewSet
+from .asyncviews import account_retrieve, account_operations, log_list
 
 
 router = routers.DefaultRouter()
@@ -14,7 +15,13 @@ router.register(r"accounttype", AccountTypeViewSet, basename="accounttypes")
 router.register(r"parameter", ParameterViewSet, basename="parameters")
 router.register(r"monitoring", LogViewSet, basename="monitorings")
 
+async_urlpatterns = [
+    path("account/<int:pk>/", account_retrieve, name="async-accounts-detail"),
+    path("account/<int:pk>/operations/", account_operations, name="async-accounts-operations"),
+    path("monitoring/", log_list, name="async-monitorings-list"),]
+
 urlpatterns = [
+    path("api/async/", include(async_urlpatterns)),
     path("api/", include(router.urls)),
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
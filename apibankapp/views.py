@@ -1,30 +1,56 @@
 # -*- coding: utf-8 -*-
 
-import datetime
-import decimal
 from rest_framework import viewsets
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import APIException
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.http import JsonResponse
-from django.http.response import HttpResponse
-from django.db import transaction
-from django.db.models import ProtectedError
-from openpyxl import Workbook
-from openpyxl.styles import Border, Side, PatternFill, Font
+from rest_framework.response import Response
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse
+from django.utils import timezone
+from django.db.models import Prefetch, ProtectedError
 from drf_yasg.utils import swagger_auto_schema
 from .models import CustomerModel, AccountModel, AccountTypeModel, ParameterModel, OperationModel, LogModel
 from .serializers import (
                             CustomerCreateSerializer, CustomerUpdateSerializer, CustomerLRDSerializer,
-                            AccountCreateSerializer, AccountUpdateSerializer, AccountLRDSerializer, AccountOperationSerializer,
+                            AccountCreateSerializer, AccountUpdateSerializer, AccountLRDSerializer,
                             AccountTypeCLRDSerializer, AccountTypeUpdateSerializer,
                             ParameterSerializer,
-                            OperationNewSerializer, OperationHistorySerializer, OperationInterestSerializer,
-                            LogMonitoringSerializer)
-from .decorators import ActivityMonitoringClass
+                            OperationNewSerializer, OperationBulkSerializer, OperationHistorySerializer,
+                            BalanceAsOfSerializer, BalanceSeriesSerializer,
+                            LogMonitoringSerializer, LogStatsSerializer, FastSerializerClass)
+from .caches import parameter_cache, account_type_cache, customer_response_cache, account_response_cache, account_type_response_cache
+from .decorators import ActivityMonitoringClass, ResponseCacheClass, ConditionalGetClass
+from .paginations import CustomKeysetPagination
 from .filters import CustomerFilter, AccountFilter, AccountTypeFilter, LogFilter
-from .functions import generate_iban, get_balance_and_debit
+from .metrics import metrics as action_metrics
+from .exports import EXPORT_FIELDS, EXPORT_FORMATS, export_operations
+from .functions import (
+                            generate_iban, generate_bulk_iban, post_operation, post_bulk_operations, count_interest,
+                            get_balance_as_of, get_balance_series,
+                            get_customer_version, get_account_version, get_operations_version, get_log_stats)
+
+
+""" Fast read """
+class FastReadClass:
+    # Actions listed here read rows with values() and skip building model instances
+    fast_read_actions = dict()
+
+    def is_fast_read(self):
+        return settings.FAST_READ and self.action in self.fast_read_actions
+
+    def get_fast_response(self, queryset, safe_response=False):
+        fast_serializer = self.fast_read_actions[self.action]
+        context = self.get_serializer_context()
+        queryset = fast_serializer.get_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.to_representation(page, context))
+        data = fast_serializer.to_representation(queryset, context)
+        if safe_response:
+            return JsonResponse(data=data, safe=False, status=status.HTTP_200_OK)
+        return Response(data)
 
 
 """ Customer """
@@ -38,6 +64,14 @@ class CustomerViewSet(viewsets.ModelViewSet):
     ordering = ["last_name"]
     swagger_viewset_tag = ["Customer"]
 
+    def get_queryset(self):
+        match self.action:
+            case "list" | "retrieve":
+                accounts = AccountModel.objects.only("id_account", "customer_id")
+                return CustomerModel.objects.prefetch_related(Prefetch("customer_accounts", queryset=accounts))
+            case _:
+                return CustomerModel.objects.all()
+
     def get_serializer_class(self):
         match self.action:
             case "create":
@@ -47,6 +81,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
             case _:
                 return CustomerLRDSerializer
 
+    @ResponseCacheClass(customer_response_cache)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -60,6 +95,8 @@ class CustomerViewSet(viewsets.ModelViewSet):
         except APIException as exc:
             return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
 
+    @ConditionalGetClass(get_customer_version)
+    @ResponseCacheClass(customer_response_cache)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -78,18 +115,30 @@ class CustomerViewSet(viewsets.ModelViewSet):
 
 
 """ Account """
-class AccountViewSet(viewsets.ModelViewSet):
+class AccountViewSet(FastReadClass, viewsets.ModelViewSet):
     http_method_names = ["get", "post", "put", "delete"]
     queryset = AccountModel.objects.all()
     filterset_class = AccountFilter
     search_fields = ["number_iban"]
     ordering_fields = ["number_iban"]
     swagger_viewset_tag = ["Account"]
+    fast_read_actions = {
+                            "list": FastSerializerClass(AccountLRDSerializer),
+                            "operations": FastSerializerClass(OperationHistorySerializer)}
+
+    def get_queryset(self):
+        match self.action:
+            case "list" | "retrieve" | "generate" | "newoperation":
+                return AccountModel.objects.select_related("account_type", "customer")
+            case _:
+                return AccountModel.objects.all()
 
     def get_serializer_class(self):
         match self.action:
             case "newoperation":
                 return OperationNewSerializer
+            case "bulk_operations":
+                return OperationBulkSerializer
             case "create":
                 return AccountCreateSerializer
             case "update":
@@ -97,7 +146,10 @@ class AccountViewSet(viewsets.ModelViewSet):
             case _:
                 return AccountLRDSerializer
 
+    @ResponseCacheClass(account_response_cache)
     def list(self, request, *args, **kwargs):
+        if self.is_fast_read():
+            return self.get_fast_response(self.filter_queryset(self.get_queryset()))
         return super().list(request, *args, **kwargs)
 
     @ActivityMonitoringClass()
@@ -113,6 +165,8 @@ class AccountViewSet(viewsets.ModelViewSet):
         except APIException as exc:
             return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
 
+    @ConditionalGetClass(get_account_version)
+    @ResponseCacheClass(account_response_cache)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -150,9 +204,10 @@ class AccountViewSet(viewsets.ModelViewSet):
             try:
                 account = instance.id_account
                 customer = instance.customer_id
-                country_code = ParameterModel.objects.get().country_code
-                bank_number = ParameterModel.objects.get().bank_number
-                subaccount = AccountTypeModel.objects.get(id_account_type=instance.account_type_id).subaccount
+                parameter = parameter_cache.first()
+                country_code = parameter.country_code
+                bank_number = parameter.bank_number
+                subaccount = account_type_cache.get(instance.account_type_id).subaccount
                 iban = generate_iban(
                                         country_code=country_code,
                                         bank_number=bank_number,
@@ -169,45 +224,77 @@ class AccountViewSet(viewsets.ModelViewSet):
         else:
             return JsonResponse({"message": "IBAN number already exists."}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="generate-bulk")
+    @ActivityMonitoringClass()
+    def generate_bulk(self, request, pk=None):
+        summary = generate_bulk_iban()
+        if not summary["generated"] and not summary["skipped"]:
+            return JsonResponse(data={"message": "No accounts without IBAN number."}, status=status.HTTP_200_OK)
+        msg = f"IBAN number for {summary['generated']} account(s) has been generated."
+        return JsonResponse(data={"message": msg, **summary}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"])
     @ActivityMonitoringClass()
     def newoperation(self, request, pk=None):
         instance = self.get_object()
-        if request.method == "POST":
-            try:
-                with transaction.atomic():
-                    serializer_operation = OperationNewSerializer(data=request.data)
-                    serializer_operation.is_valid(raise_exception=True)
-                    # Choosing operation type
-                    if serializer_operation.validated_data.get("type_operation") == 2:
-                        serializer_operation.validated_data["value_operation"] *= (-1)
-                    # Getting data from account
-                    balance, debit = get_balance_and_debit(instance.id_account)
-                    # Calculating balance & free_balance after transaction
-                    balance_after_operation = balance + serializer_operation.validated_data.get("value_operation")
-                    free_balance_after_operation = balance_after_operation + debit
-                    # Updating balance & free balance for account
-                    data_account = {
-                                        "balance": balance_after_operation,
-                                        "free_balance": free_balance_after_operation}
-                    serializer_account = AccountOperationSerializer(instance, data=data_account, partial=True)
-                    serializer_account.is_valid(raise_exception=True)
-                    instance = serializer_account.save()
-                    # Creating new operation
-                    serializer_operation.validated_data["id_account"] = instance
-                    serializer_operation.validated_data["balance_after_operation"] = balance_after_operation
-                    serializer_operation.save(operation_employee=self.request.user)
-            except APIException as exc:
-                return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            serializer = OperationNewSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            account, _ = post_operation(
+                                            id_account=instance.id_account,
+                                            type_operation=serializer.validated_data.get("type_operation"),
+                                            value_operation=serializer.validated_data.get("value_operation"),
+                                            operation_employee=str(self.request.user))
+            instance.balance = account.balance
+            instance.free_balance = account.free_balance
+        except APIException as exc:
+            return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
         return_serializer = AccountLRDSerializer(instance, context={"request": request})
         return JsonResponse(data=return_serializer.data, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=["get"])
+    @action(detail=False, methods=["post"], url_path="bulk-operations")
+    @ActivityMonitoringClass()
+    def bulk_operations(self, request, pk=None):
+        if not isinstance(request.data, list) or not request.data:
+            return JsonResponse(data={"message": "List of operations is required."}, status=status.HTTP_400_BAD_REQUEST)
+        # Every affected account stays locked until whole list is posted
+        if len(request.data) > settings.BULK_OPERATIONS_LIMIT:
+            return JsonResponse(data={"message": f"List can contain at most {settings.BULK_OPERATIONS_LIMIT} operations."}, status=status.HTTP_400_BAD_REQUEST)
+        results = dict()
+        operations = list()
+        serializer = OperationBulkSerializer()
+        for index, item in enumerate(request.data):
+            try:
+                validated_data = serializer.run_validation(item)
+                operations.append((
+                                    index,
+                                    validated_data.get("account"),
+                                    validated_data.get("type_operation"),
+                                    validated_data.get("value_operation")))
+            except APIException as exc:
+                results[index] = {"index": index, "account": item.get("account") if isinstance(item, dict) else None, "status": "Failed", "error": exc.detail}
+        results.update(post_bulk_operations(operations, operation_employee=str(self.request.user)))
+        results = [results[index] for index in sorted(results)]
+        succeeded = sum(1 for result in results if result["status"] == "Success")
+        failed = len(results) - succeeded
+        data = {
+                "message": f"{succeeded} operation(s) posted, {failed} operation(s) failed.",
+                "succeeded": succeeded,
+                "failed": failed,
+                "results": results}
+        if not succeeded:
+            return JsonResponse(data=data, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse(data=data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"], pagination_class=CustomKeysetPagination)
+    @ConditionalGetClass(get_operations_version)
     def operations(self, request, pk=None):
         instance = self.get_object()
         try:
             queryset = OperationModel.objects.filter(id_account=instance.id_account).order_by("-operation_date")
             queryset = self.filter_queryset(queryset)
+            if self.is_fast_read():
+                return self.get_fast_response(queryset, safe_response=True)
             page = self.paginate_queryset(queryset)
             if page is not None:
                 serializer = OperationHistorySerializer(page, context={"request": request}, many=True)
@@ -217,104 +304,58 @@ class AccountViewSet(viewsets.ModelViewSet):
         except APIException as exc:
                 return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["get"], url_path="balance")
+    def balance_as_of(self, request, pk=None):
+        instance = self.get_object()
+        try:
+            serializer = BalanceAsOfSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            balance_date = serializer.validated_data.get("date", timezone.localdate())
+            data = {
+                    "id_account": instance.id_account,
+                    "date": balance_date,
+                    "balance": get_balance_as_of(instance.id_account, balance_date)}
+            return JsonResponse(data=data, status=status.HTTP_200_OK)
+        except APIException as exc:
+            return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=["get"], url_path="balances")
+    def balance_series(self, request, pk=None):
+        instance = self.get_object()
+        try:
+            serializer = BalanceSeriesSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            date_from = serializer.validated_data.get("date_from")
+            date_to = serializer.validated_data.get("date_to")
+            data = {
+                    "id_account": instance.id_account,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                    "results": get_balance_series(instance.id_account, date_from, date_to)}
+            return JsonResponse(data=data, status=status.HTTP_200_OK)
+        except APIException as exc:
+            return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=["get"])
     def export(self, request, pk=None):
-        side = Side(style="dashed", color="FF000000")
-        border_around = Border(left=side, right=side, top=side, bottom=side)
-        file_name = "History_operations.xlsx"
-        fields = [
-                    "id_operation",
-                    "type_operation",
-                    "value_operation",
-                    "balance_after_operation",
-                    "operation_date"]
+        file_format = request.query_params.get("file_format", "xlsx")
+        if file_format not in EXPORT_FORMATS:
+            return JsonResponse({"message": f"File format should be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
         instance = self.get_object()
-        data = OperationModel.objects.filter(id_account=instance.id_account).order_by("-operation_date").values_list(*fields)
+        data = OperationModel.objects.filter(id_account=instance.id_account).order_by("-operation_date").values_list(*EXPORT_FIELDS)
         data = self.filter_queryset(data)
         if not data.exists():
             return JsonResponse({"message": "No data to be exported"}, status=status.HTTP_400_BAD_REQUEST)
-        response = HttpResponse(content_type="application/vnd.ms-excel")
-        response["Content-Disposition"] = f"attachment; filename={file_name}"
-        workbook = Workbook()
-        workbook.iso_dates = True
-        worksheet = workbook.active
-        worksheet.title = "Operations"
-        # Column headers
-        headers = [
-                    "Id operation",
-                    "Typ of operation",
-                    "Value operation",
-                    "Balance after operation",
-                    "Operation date"]
-        for column_number, column_title in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=column_number)
-            cell.value = column_title
-            cell.font = Font(bold=True, italic=True)
-            cell.fill = PatternFill(fgColor="0000FFFF", fill_type="solid")
-            cell.border = border_around
-        # Cell data
-        for row_number, row in enumerate(data, 1):
-            for column_number, cell_value in enumerate(row, 1):
-                if type(cell_value) is datetime.datetime:
-                    cell_value = cell_value.replace(tzinfo=None)
-                    cell_value = cell_value.strftime('%d.%m.%Y %H:%M:%S')
-                if column_number == 2:
-                    match cell_value:
-                        case 1:
-                            cell_value = "Deposit"
-                        case 2:
-                            cell_value = "Withdrawal"
-                        case 3:
-                            cell_value = "Interest"
-                cell = worksheet.cell(row=row_number+1, column=column_number)
-                cell.value = cell_value
-                cell.border = border_around
-                if type(cell_value) is decimal.Decimal:
-                    cell.number_format = "#,##0.00"
-        # AutoFit column width
-        for column in worksheet.columns:
-            max_length = max(len(str(cell.value)) for cell in column)
-            adjusted_width = (max_length + 2) * 1.1
-            worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-        workbook.save(response)
-        return response
+        return export_operations(data, file_format)
 
     @action(detail=False, methods=["post"])
     @ActivityMonitoringClass()
     def interest(self, request, pk=None):
-        data = AccountModel.objects.filter(balance__gt = 0, percent__gt = 0)
-        if data.exists():
-            try:
-                with transaction.atomic():
-                    counter = 0
-                    for instance in data:
-                        # Calculating data
-                        interest = round(instance.balance * (instance.percent / 100), 2)
-                        new_balance = instance.balance + interest
-                        new_free_balance = new_balance + instance.debit
-                        # Updating balance & free balance for account
-                        data_account = {
-                                            "balance": new_balance,
-                                            "free_balance": new_free_balance}
-                        serializer = AccountOperationSerializer(instance, data=data_account, partial=True)
-                        serializer.is_valid(raise_exception=True)
-                        serializer.save()
-                        # Creating new operation
-                        data_operation = {
-                                            "type_operation": 3,
-                                            "value_operation": interest,
-                                            "balance_after_operation": new_balance,
-                                            "id_account": instance.id_account}
-                        serializer = OperationInterestSerializer(data=data_operation)
-                        serializer.is_valid(raise_exception=True)
-                        serializer.save(operation_employee=self.request.user)
-                        counter += 1
-                    msg = f"Interest for {counter} account(s) has been recounted."
-                    return JsonResponse(data={"message": msg}, status=status.HTTP_200_OK)
-            except APIException as exc:
-                return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
-        else:
+        summary = count_interest(operation_employee=str(self.request.user))
+        if not summary["accounts"]:
             return JsonResponse(data={"message": "No accounts to be recounted."}, status=status.HTTP_200_OK)
+        msg = f"Interest for {summary['accounts']} account(s) has been recounted."
+        return JsonResponse(data={"message": msg, **summary}, status=status.HTTP_200_OK)
 
 
 """ Account Type """
@@ -333,12 +374,14 @@ class AccountTypeViewSet(viewsets.ModelViewSet):
             case _:
                 return AccountTypeCLRDSerializer
 
+    @ResponseCacheClass(account_type_response_cache)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
     
+    @ResponseCacheClass(account_type_response_cache)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
     
@@ -378,19 +421,46 @@ class ParameterViewSet(viewsets.ModelViewSet):
 
 
 """ Log """
-class LogViewSet(viewsets.ModelViewSet):
+class LogViewSet(FastReadClass, viewsets.ModelViewSet):
     http_method_names = ["get"]
     queryset = LogModel.objects.all().order_by("-date_log")
     serializer_class = LogMonitoringSerializer
+    pagination_class = CustomKeysetPagination
     filterset_class = LogFilter
     search_fields = ["user_log"]
     ordering_fields = ["date_log", "duration_log"]
     ordering = ["-duration_log"]
     swagger_viewset_tag = ["Log"]
+    fast_read_actions = {"list": FastSerializerClass(LogMonitoringSerializer)}
 
     def list(self, request, *args, **kwargs):
+        if self.is_fast_read():
+            return self.get_fast_response(self.filter_queryset(self.get_queryset()))
         return super().list(request, *args, **kwargs)
 
     @swagger_auto_schema(auto_schema=None)
     def retrieve(self, request, *args, **kwargs):
         return JsonResponse(data={"message": "Method is not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @swagger_auto_schema(query_serializer=LogStatsSerializer)
+    @action(detail=False, methods=["get"], url_path="stats", filter_backends=[], pagination_class=None)
+    def stats(self, request, pk=None):
+        try:
+            serializer = LogStatsSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            date_from = serializer.validated_data.get("date_from")
+            date_to = serializer.validated_data.get("date_to")
+            method, results = get_log_stats(date_from, date_to)
+            data = {
+                    "date_from": date_from,
+                    "date_to": date_to,
+                    "method": method,
+                    "results": results}
+            return JsonResponse(data=data, status=status.HTTP_200_OK)
+        except APIException as exc:
+            return JsonResponse(data=exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    @swagger_auto_schema(auto_schema=None)
+    @action(detail=False, methods=["get"], url_path="metrics", filter_backends=[], pagination_class=None)
+    def metrics(self, request, pk=None):
+        return HttpResponse(action_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import tempfile
 import dj_database_url
 from dotenv import load_dotenv
 from pathlib import Path
@@ -12,7 +13,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 SECRET_KEY = os.getenv('SECRET_KEY')
-DEBUG = os.getenv('DEBUG', default=False)
+DEBUG = os.getenv('DEBUG', default='False').lower() in ('1', 'true', 'yes')
 ALLOWED_HOSTS = list(os.getenv('ALLOWED_HOSTS').split(' '))
 
 
@@ -24,29 +25,41 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'apibankapp',
+    'userapp',
     'rest_framework',
     'django_filters',
     'rest_framework.authtoken',
-    'drf_yasg',
-    'debug_toolbar']
+    'drf_yasg']
 
 
 MIDDLEWARE = [
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'apibankapp.middleware.ProfilingMiddleware',
+    'apibankapp.middleware.QueryTracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.cache.FetchFromCacheMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apibankapp.middleware.ExceptionMiddleware',]
 
+# Debug toolbar slows every request down, it is loaded for development only
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE.insert(0, 'debug_toolbar.middleware.DebugToolbarMiddleware')
 
-CACHE_MIDDLEWARE_SECONDS = 120
-CACHE_MIDDLEWARE_KEY_PREFIX = ''
+
+RESPONSE_CACHE_SECONDS = int(os.getenv('RESPONSE_CACHE_SECONDS', default=300))
+BULK_OPERATIONS_LIMIT = int(os.getenv('BULK_OPERATIONS_LIMIT', default=10000))
+FAST_READ = os.getenv('FAST_READ', default='True') == 'True'
+AUTH_TOKEN_CACHE = {
+    'SECONDS': int(os.getenv('AUTH_TOKEN_CACHE_SECONDS', default=300)),
+    'LOCAL_SECONDS': int(os.getenv('AUTH_TOKEN_CACHE_LOCAL_SECONDS', default=60)),
+    'SIZE': int(os.getenv('AUTH_TOKEN_CACHE_SIZE', default=1000))}
+AUTH_BASIC_CACHE = {
+    'SECONDS': int(os.getenv('AUTH_BASIC_CACHE_SECONDS', default=300)),
+    'SIZE': int(os.getenv('AUTH_BASIC_CACHE_SIZE', default=1000))}
 
 
 ROOT_URLCONF = 'apibankproject.urls'
@@ -127,8 +140,8 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.TokenAuthentication',],
+        'userapp.authentication.CachedBasicAuthenticationClass',
+        'userapp.authentication.CachedTokenAuthenticationClass',],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',],
@@ -144,6 +157,29 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',],}
 
 
+LOG_MONITORING = {
+    'ASYNC': os.getenv('LOG_MONITORING_ASYNC', default='True') == 'True',
+    'BATCH_SIZE': int(os.getenv('LOG_MONITORING_BATCH_SIZE', default=200)),
+    'FLUSH_INTERVAL': float(os.getenv('LOG_MONITORING_FLUSH_INTERVAL', default=1.0)),
+    'QUEUE_SIZE': int(os.getenv('LOG_MONITORING_QUEUE_SIZE', default=10000))}
+# Statements slower than threshold are saved with monitoring record and written to slow query log
+SQL_TRACING = {
+    'SLOW_QUERY_SECONDS': float(os.getenv('SQL_TRACING_SLOW_QUERY_SECONDS', default=0.1)),
+    'SLOW_REQUEST_SECONDS': float(os.getenv('SQL_TRACING_SLOW_REQUEST_SECONDS', default=1.0)),
+    'SLOW_QUERIES_LIMIT': int(os.getenv('SQL_TRACING_SLOW_QUERIES_LIMIT', default=10))}
+# Single request is profiled when it carries header signed with SECRET_KEY (manage.py profiletoken)
+PROFILING = {
+    'HEADER': os.getenv('PROFILING_HEADER', default='X-Profile'),
+    'MAX_AGE': int(os.getenv('PROFILING_MAX_AGE', default=3600)),
+    'DIR': os.getenv('PROFILING_DIR', default=os.path.join(tempfile.gettempdir(), 'apibank-profiles')),
+    'SORT': os.getenv('PROFILING_SORT', default='cumulative')}
+LOG_RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', default=6))
+# Gunicorn workers save their histograms to shared directory, metrics endpoint merges them
+METRICS = {
+    'DIR': os.getenv('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'apibank-metrics')),
+    'FLUSH_INTERVAL': float(os.getenv('METRICS_FLUSH_INTERVAL', default=5.0))}
+
+
 SWAGGER_SETTINGS = {
     "DEFAULT_AUTO_SCHEMA_CLASS": "apibankapp.custom.CustomAutoSchema"}
 
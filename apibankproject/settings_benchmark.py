@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+import os
+import dj_database_url
+from .settings import *
+
+
+DEBUG = False
+
+DATABASES = {
+    'default': dj_database_url.config(default=os.getenv('BENCHMARK_DATABASE_URL', default=f'sqlite:///{BASE_DIR / "benchmark.sqlite3"}'))}
+
+# Threads of benchmark share test database, so in-memory SQLite is replaced with file
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': str(BASE_DIR / 'benchmark_test.sqlite3')}
+    DATABASES['default']['OPTIONS'] = {'timeout': 30}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark'}}
+
+LOG_MONITORING = {**LOG_MONITORING, 'ASYNC': False}
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-import debug_toolbar
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.urls import path, include
@@ -24,7 +24,11 @@ schema_view = get_schema_view(
 urlpatterns = [
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
     path("favicon.ico/", RedirectView.as_view(url=staticfiles_storage.url("images/favicon.ico"))),
-    path("__debug__/", include(debug_toolbar.urls)),
     path("admin/", admin.site.urls),
     path("user/", include("userapp.urls")),
     path("", include("apibankapp.urls")),]
+
+
+if settings.DEBUG:
+    import debug_toolbar
+    urlpatterns.append(path("__debug__/", include(debug_toolbar.urls)))
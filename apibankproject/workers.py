@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+import os
+from uvicorn.workers import UvicornWorker
+
+
+class UvicornBudgetWorker(UvicornWorker):
+    # Number of requests served at once limits database connections opened by worker
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "limit_concurrency": int(os.getenv("GUNICORN_ASGI_CONCURRENCY", default=4))}
@@ -0,0 +1,42 @@
+import os
+import multiprocessing
+
+
+# Synchronous parts of every request (authentication, ORM) run in their own thread with own database connection,
+# so service needs workers x GUNICORN_ASGI_CONCURRENCY connections, capped by GUNICORN_ASGI_DB_CONNECTIONS when it is set
+db_connections = int(os.getenv("GUNICORN_ASGI_DB_CONNECTIONS", default=0))
+concurrency = int(os.getenv("GUNICORN_ASGI_CONCURRENCY", default=4))
+
+bind = os.getenv("GUNICORN_ASGI_BIND", default="0.0.0.0:8001")
+# Single event loop serves many requests, so one worker per core is enough
+preset_workers = multiprocessing.cpu_count() + 1
+workers = int(os.getenv("GUNICORN_ASGI_WORKERS", default=max(1, min(preset_workers, db_connections // concurrency)) if db_connections else preset_workers))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", default=90))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", default=30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", default=5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", default=1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", default=100))
+# Asynchronous views wait for database without blocking worker, requests above concurrency get 503
+worker_class = "apibankproject.workers.UvicornBudgetWorker"
+
+
+def when_ready(server):
+    server.log.info("Running %s worker(s), up to %s database connection(s).", workers, workers * concurrency)
+    if db_connections and "GUNICORN_ASGI_WORKERS" not in os.environ and workers < preset_workers:
+        server.log.warning("Workers (%s) are reduced to %s by database connection budget.", preset_workers, workers)
+
+
+def worker_exit(server, worker):
+    from apibankapp.monitoring import log_writer
+    from apibankapp.metrics import metrics
+    log_writer.stop()
+    metrics.flush()
+
+
+# Runs in master, also for workers killed after timeout, so their metrics files do not pile up
+def child_exit(server, worker):
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "apibankproject.settings")
+    django.setup()
+    from apibankapp.metrics import metrics
+    metrics.retire(worker.pid)
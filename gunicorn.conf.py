@@ -1,4 +1,58 @@
-bind = "0.0.0.0:8000"
-timeout = 90
-workers = 4
-threads = 3
+import os
+import multiprocessing
+
+
+# Presets are starting points, every value can be overridden from environment
+# Every thread of every worker can hold its own database connection, so preset needs workers x threads connections:
+#   cpu - (cpu_count + 1) x 1, io - (cpu_count * 2 + 1) x 4, e.g. 132 on 16 cores
+# When GUNICORN_DB_CONNECTIONS is set, workers are capped by it, asynchronous service has its own budget (gunicorn.asgi.conf.py)
+# and both together have to stay below max_connections of PostgreSQL (100 by default)
+cpu_count = multiprocessing.cpu_count()
+presets = {
+            # Serializing and hashing passwords, one process per core without threads
+            "cpu": {
+                        "workers": cpu_count + 1,
+                        "threads": 1,
+                        "worker_class": "sync"},
+            # Waiting for database and Redis, threads share process while request is blocked
+            "io": {
+                        "workers": cpu_count * 2 + 1,
+                        "threads": 4,
+                        "worker_class": "gthread"}}
+preset = presets[os.getenv("GUNICORN_PRESET", default="io")]
+db_connections = int(os.getenv("GUNICORN_DB_CONNECTIONS", default=0))
+
+bind = os.getenv("GUNICORN_BIND", default="0.0.0.0:8000")
+threads = int(os.getenv("GUNICORN_THREADS", default=preset["threads"]))
+workers = int(os.getenv("GUNICORN_WORKERS", default=max(1, min(preset["workers"], db_connections // threads)) if db_connections else preset["workers"]))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", default=preset["worker_class"])
+timeout = int(os.getenv("GUNICORN_TIMEOUT", default=90))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", default=30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", default=5))
+# Workers are restarted from time to time, so memory growth does not accumulate
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", default=1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", default=100))
+# Application is imported once in master and shared by forked workers
+preload_app = os.getenv("GUNICORN_PRELOAD_APP", default="True") == "True"
+
+
+def when_ready(server):
+    server.log.info("Running %s worker(s) x %s thread(s), up to %s database connection(s).", workers, threads, workers * threads)
+    if db_connections and "GUNICORN_WORKERS" not in os.environ and workers < preset["workers"]:
+        server.log.warning("Workers of preset (%s) are reduced to %s by database connection budget.", preset["workers"], workers)
+
+
+def worker_exit(server, worker):
+    from apibankapp.monitoring import log_writer
+    from apibankapp.metrics import metrics
+    log_writer.stop()
+    metrics.flush()
+
+
+# Runs in master, also for workers killed after timeout, so their metrics files do not pile up
+def child_exit(server, worker):
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "apibankproject.settings")
+    django.setup()
+    from apibankapp.metrics import metrics
+    metrics.retire(worker.pid)
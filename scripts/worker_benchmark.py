@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Runs API under gunicorn with different worker classes and compares throughput and tail latency.
+# Database, Redis and environment are the same as for normal run, token of existing user is required:
+#   python scripts/worker_benchmark.py --token <token> --requests 500 --concurrency 16
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib.util
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {
+            "sync": {"application": "apibankproject.wsgi:application", "config": "gunicorn.conf.py", "worker_class": "sync", "threads": 1},
+            "gthread": {"application": "apibankproject.wsgi:application", "config": "gunicorn.conf.py", "worker_class": "gthread", "threads": 4},
+            # Worker class of asynchronous service is set in its own configuration
+            "uvicorn": {"application": "apibankproject.asgi:application", "config": "gunicorn.asgi.conf.py", "worker_class": None, "threads": 1}}
+PATHS = [
+            "/api/account/?limit=20",
+            "/api/customer/?limit=20",
+            "/api/monitoring/?limit=20"]
+
+
+def get_percentile(values, percent):
+    values = sorted(values)
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(mode, port, workers):
+    env = dict(os.environ)
+    if MODES[mode]["worker_class"] is None:
+        env.update({
+                    "GUNICORN_ASGI_BIND": f"127.0.0.1:{port}",
+                    "GUNICORN_ASGI_WORKERS": str(workers)})
+    else:
+        env.update({
+                    "GUNICORN_BIND": f"127.0.0.1:{port}",
+                    "GUNICORN_WORKERS": str(workers),
+                    "GUNICORN_THREADS": str(MODES[mode]["threads"]),
+                    "GUNICORN_WORKER_CLASS": MODES[mode]["worker_class"]})
+    command = [sys.executable, "-m", "gunicorn", MODES[mode]["application"], "-c", MODES[mode]["config"], "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BASE_DIR, env=env)
+
+
+def run_load(port, token, requests, concurrency):
+    headers = {"Authorization": f"Token {token}"}
+
+    def send(numbers):
+        # Every thread keeps its own connection alive, as proxy in front of gunicorn would
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        results = list()
+        for number in numbers:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", PATHS[number % len(PATHS)], headers=headers)
+                response = connection.getresponse()
+                response.read()
+                success = response.status < 400
+                if response.getheader("Connection", "").lower() == "close":
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                success = False
+            results.append((time.perf_counter() - start, success))
+        connection.close()
+        return results
+
+    chunks = [range(number, requests, concurrency) for number in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [result for chunk in executor.map(send, chunks) for result in chunk]
+    duration = time.perf_counter() - start
+    latencies = [result[0] * 1000 for result in results]
+    return {
+            "requests": len(results),
+            "errors": len([result for result in results if not result[1]]),
+            "duration": round(duration, 4),
+            "throughput": round(len(results) / duration, 2),
+            "latency_ms": {
+                            "p50": round(get_percentile(latencies, 50), 3),
+                            "p95": round(get_percentile(latencies, 95), 3),
+                            "p99": round(get_percentile(latencies, 99), 3),
+                            "max": round(max(latencies), 3)}}
+
+
+def run_mode(mode, options):
+    if mode == "uvicorn" and importlib.util.find_spec("uvicorn") is None:
+        return {"skipped": "uvicorn is not installed."}
+    port = get_free_port()
+    process = start_server(mode, port, options.workers)
+    try:
+        if not wait_for_port(port, process):
+            return {"skipped": "gunicorn did not start."}
+        run_load(port, options.token, options.warmup, options.concurrency)
+        return run_load(port, options.token, options.requests, options.concurrency)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares gunicorn worker classes for API.")
+    parser.add_argument("--token", default=os.getenv("BENCHMARK_TOKEN"), help="Token of user sending requests.")
+    parser.add_argument("--mode", nargs="*", choices=list(MODES), default=list(MODES), help="Worker classes to be compared.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() + 1, help="Number of gunicorn workers.")
+    parser.add_argument("--requests", type=int, default=500, help="Number of measured requests in each mode.")
+    parser.add_argument("--warmup", type=int, default=50, help="Number of requests sent before measurement.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent connections.")
+    parser.add_argument("--output", default="worker_benchmark.json", help="File of JSON report.")
+    options = parser.parse_args()
+    if not options.token:
+        parser.error("Token is required (--token or BENCHMARK_TOKEN).")
+    report = {
+                "meta": {
+                            "cpu_count": os.cpu_count(),
+                            "workers": options.workers,
+                            "requests": options.requests,
+                            "concurrency": options.concurrency,
+                            "paths": PATHS},
+                "modes": dict()}
+    for mode in options.mode:
+        result = run_mode(mode, options)
+        report["modes"][mode] = result
+        if "skipped" in result:
+            print(f"{mode}: skipped, {result['skipped']}")
+        else:
+            print(
+                    f"{mode}: {result['throughput']} req/s, p50 {result['latency_ms']['p50']} ms, "
+                    f"p95 {result['latency_ms']['p95']} ms, p99 {result['latency_ms']['p99']} ms, {result['errors']} error(s)")
+    with open(options.output, "w") as file:
+        json.dump(report, file, indent=4)
+    print(f"Report has been saved to {options.output}.")
+
+
+if __name__ == "__main__":
+    main()
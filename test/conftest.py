@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import time
+import datetime
+from decimal import Decimal
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apibankapp.models import CustomerModel, AccountModel, AccountTypeModel, OperationModel, LogModel
 
 
 # Preparing envoirment for testing
@@ -24,15 +31,134 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache_for_all_tests():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def log_monitoring_sync(settings):
+    settings.LOG_MONITORING = {**settings.LOG_MONITORING, "ASYNC": False}
+
+
+def pytest_addoption(parser):
+    parser.addini("budget_queries", "Default maximum number of queries in one request of client_test.", default="20")
+    parser.addini("budget_duration", "Default maximum duration of one request of client_test in seconds.", default="2.0")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "budget(queries=None, duration=None, path=None): maximum queries and duration of requests of client_test, limited to path prefix if given.")
+
+
+# Every request of client_test is measured against budget of test
+class BudgetClientClass(APIClient):
+
+    def __init__(self, budgets, default_budget, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.records = list()
+
+    def get_budget(self, path):
+        queries, duration = self.default_budget
+        # The longest matching path prefix wins, budget without path applies to all requests
+        budgets = sorted(
+                            [budget for budget in self.budgets if path.startswith(budget.get("path") or "")],
+                            key=lambda budget: len(budget.get("path") or ""))
+        for budget in budgets:
+            queries = budget["queries"] if budget.get("queries") is not None else queries
+            duration = budget["duration"] if budget.get("duration") is not None else duration
+        return queries, duration
+
+    def request(self, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = super().request(**kwargs)
+            duration = time.perf_counter() - start
+        path = kwargs.get("PATH_INFO", "")
+        record = {
+                    "method": kwargs.get("REQUEST_METHOD"),
+                    "path": path,
+                    "status": response.status_code,
+                    "queries": context.captured_queries,
+                    "duration": duration}
+        self.records.append(record)
+        queries_budget, duration_budget = self.get_budget(path)
+        if len(record["queries"]) > queries_budget or duration > duration_budget:
+            details = "\n".join(f"    {query['time']}s {query['sql']}" for query in record["queries"])
+            pytest.fail(
+                        f"{record['method']} {path} exceeded budget: {len(record['queries'])} queries (max {queries_budget}), "
+                        f"{duration:.3f}s (max {duration_budget}s):\n{details}")
+        return response
+
+
 @pytest.fixture()
-def client_test():
+def client_test(request):
     user = User.objects.create_superuser(username="test_user", password="test_password")
-    api_client = APIClient()
+    budgets = [marker.kwargs for marker in request.node.iter_markers("budget")]
+    default_budget = (int(request.config.getini("budget_queries")), float(request.config.getini("budget_duration")))
+    api_client = BudgetClientClass(budgets, default_budget)
     api_client.force_authenticate(user=user)
     return api_client
 
 
+# Checking number of queries
+@pytest.fixture()
+def assert_constant_queries(client_test):
+
+    def assert_constant(variants):
+        captured = list()
+        for path, data in variants:
+            with CaptureQueriesContext(connection) as context:
+                response = client_test.get(path=path, data=data)
+            assert response.status_code == 200
+            captured.append((path, data, context.captured_queries))
+        counts = [len(queries) for _, _, queries in captured]
+        if len(set(counts)) != 1:
+            details = "\n".join(
+                                f"{path} {data}: {len(queries)} queries\n" + "\n".join(f"    {query['sql']}" for query in queries)
+                                for path, data, queries in captured)
+            pytest.fail(f"Number of queries depends on data size {counts}:\n{details}")
+        return counts[0]
+
+    return assert_constant
+
+
 # Preparing sample data
+def seed_test_data(customers=12, accounts=200, operations=2000, logs=2000):
+    customers = CustomerModel.objects.bulk_create([
+                                                    CustomerModel(
+                                                                    first_name="John", last_name=f"Walker{number}", street="GreenWood", house="1",
+                                                                    postal_code="45-200", city="Los Angeles", pesel=f"{89071203452 + number}",
+                                                                    birth_date=datetime.date(1989, 7, 12), birth_city="New York", identification="ABX9234")
+                                                    for number in range(customers)])
+    customers = list(CustomerModel.objects.order_by("id_customer"))
+    account_type = AccountTypeModel.objects.create(code="S-01", description="Standard account", subaccount="994500", percent=Decimal("7.35"))
+    AccountModel.objects.bulk_create([
+                                        AccountModel(
+                                                        balance=Decimal(number % 3), debit=Decimal(0), free_balance=Decimal(number % 3),
+                                                        percent=Decimal(number % 2), account_type=account_type,
+                                                        customer=customers[number % (len(customers) - 1)])
+                                        for number in range(accounts)])
+    accounts = list(AccountModel.objects.order_by("id_account"))
+    OperationModel.objects.bulk_create([
+                                        OperationModel(
+                                                        type_operation=1, value_operation=Decimal(1), balance_after_operation=Decimal(number),
+                                                        operation_employee="test_user", id_account=accounts[number % len(accounts)])
+                                        for number in range(operations)])
+    LogModel.objects.bulk_create([
+                                    LogModel(
+                                                action_log="create", function_log="AccountViewSet", duration_log=Decimal(number) / 1000,
+                                                user_log="test_user", status_log="Success")
+                                    for number in range(logs)])
+    return {"customers": customers, "accounts": accounts}
+
+
+@pytest.fixture()
+def data_test_seeded():
+    return seed_test_data()
+
+
 def data_test_file():
     file = open("./test/image_example.jpg", "rb")
     return file
@@ -140,3 +266,4 @@ def data_test_change_password():
         "old_password": "pass100@test",
         "new_password": "pass100@new",
         "new_password_confirm": "pass100@new"}
+
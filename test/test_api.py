@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 
 import os
+import json
 import logging
+import datetime
 from decimal import Decimal
+import pytest
 from django.urls import reverse
+from django.core.management import call_command
+from django.utils import timezone
 from django.conf import settings
+from apibankapp.models import AccountTypeModel
 
 list_of_files_to_be_deleted = []
 
@@ -147,6 +153,32 @@ def sub_test_generate_iban_account(client):
 	logging.info("Generating IBAN testing finished.")
 
 
+def sub_test_get_logs(client):
+	url = reverse("monitorings-list")
+	logging.info("Monitoring logs testing ...")
+	response = client.get(path=url, data={"limit": 2, "ordering": "-date_log"})
+	response_json = response.json()
+	assert response.status_code == 200
+	assert [result["action_log"] for result in response_json["results"]] == ["generate", "update"]
+	response_json = client.get(path=response_json["next"]).json()
+	assert [result["action_log"] for result in response_json["results"]] == ["create"]
+	assert response_json["next"] is None
+	logging.info("Monitoring logs testing finished.")
+
+
+def sub_test_generate_bulk_iban_account(client, result):
+	url = reverse("accounts-list")
+	response = client.post(path=url + "generate-bulk/")
+	response_json = response.json()
+	logging.info("Generating bulk IBAN testing ...")
+	assert response.status_code == 200
+	assert response_json["message"] == result["message"]
+	assert response_json.get("generated", 0) == result.get("generated", 0)
+	response = client.get(path=url)
+	assert all(len(account["number_iban"]) == 28 for account in response.json()["results"])
+	logging.info("Generating bulk IBAN testing finished.")
+
+
 def sub_test_deposit_account(client, input_data):
 	id_account = os.environ["ACCOUNT_ID"]
 	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
@@ -173,6 +205,54 @@ def sub_test_get_deposit_operation(client):
 	logging.info("Deposit operation testing finished.")
 
 
+def sub_test_conditional_get(client, input_data):
+	id_account = os.environ["ACCOUNT_ID"]
+	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
+	logging.info("Conditional GET testing ...")
+	for path in [url, url + "operations/", reverse("customers-detail", kwargs={"pk": int(os.environ["CUSTOMER_ID"])})]:
+		response = client.get(path=path)
+		assert response.status_code == 200
+		assert response["ETag"] is not None
+		assert response["Last-Modified"] is not None
+		response_not_modified = client.get(path=path, HTTP_IF_NONE_MATCH=response["ETag"])
+		assert response_not_modified.status_code == 304
+		assert response_not_modified.content == b""
+	response = client.get(path=url + "operations/")
+	client.post(path=url + "newoperation/", data=input_data, format="json")
+	response_modified = client.get(path=url + "operations/", HTTP_IF_NONE_MATCH=response["ETag"])
+	assert response_modified.status_code == 200
+	assert response_modified["ETag"] != response["ETag"]
+	# Account type is part of account representation, so its change moves Last-Modified of account
+	response = client.get(path=url)
+	AccountTypeModel.objects.filter(id_account_type=int(os.environ["ACCOUNT_TYPE_ID"])).update(updated_date=timezone.now() + datetime.timedelta(seconds=2))
+	response_modified = client.get(path=url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+	assert response_modified.status_code == 200
+	logging.info("Conditional GET testing finished.")
+
+
+def sub_test_export_operations(client):
+	id_account = os.environ["ACCOUNT_ID"]
+	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
+	logging.info("Export operations testing ...")
+	response = client.get(path=url + "export/")
+	assert response.status_code == 200
+	assert response["Content-Type"] == "application/vnd.ms-excel"
+	assert b"".join(response.streaming_content)[:2] == b"PK"
+	response = client.get(path=url + "export/", data={"file_format": "csv"})
+	content = b"".join(response.streaming_content).decode().splitlines()
+	assert response.status_code == 200
+	assert content[0] == "Id operation,Typ of operation,Value operation,Balance after operation,Operation date"
+	assert content[1].split(",")[1:4] == ["Deposit", "100.00", "100.00"]
+	response = client.get(path=url + "export/", data={"file_format": "ndjson"})
+	content = b"".join(response.streaming_content).decode().splitlines()
+	assert response.status_code == 200
+	assert json.loads(content[0])["type_operation"] == "Deposit"
+	assert json.loads(content[0])["balance_after_operation"] == "100.00"
+	response = client.get(path=url + "export/", data={"file_format": "pdf"})
+	assert response.status_code == 400
+	logging.info("Export operations testing finished.")
+
+
 def sub_test_withdrawal_account(client, input_data):
 	id_account = os.environ["ACCOUNT_ID"]
 	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
@@ -185,6 +265,19 @@ def sub_test_withdrawal_account(client, input_data):
 	logging.info("Withdrawal testing finished.")
 
 
+def sub_test_withdrawal_over_limit_account(client):
+	id_account = os.environ["ACCOUNT_ID"]
+	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
+	response = client.post(path=url + "newoperation/", data={"type_operation": 2, "value_operation": 5000}, format="json")
+	response_json = response.json()
+	logging.info("Withdrawal over limit testing ...")
+	assert response.status_code == 400
+	assert response_json == {"message": "Free balance out of limit!"}
+	response = client.get(path=url)
+	assert response.json()["free_balance"] == "950.00"
+	logging.info("Withdrawal over limit testing finished.")
+
+
 def sub_test_get_withdrawal_operation(client):
 	id_account = os.environ["ACCOUNT_ID"]
 	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
@@ -200,16 +293,123 @@ def sub_test_get_withdrawal_operation(client):
 	logging.info("Withdrawal operation testing finished.")
 
 
+def sub_test_bulk_operations_account(client, settings):
+	id_account = int(os.environ["ACCOUNT_ID"])
+	input_data = [
+					{"account": id_account, "type_operation": 1, "value_operation": 100},
+					{"account": id_account, "type_operation": 2, "value_operation": 30},
+					{"account": id_account, "type_operation": 2, "value_operation": 5000},
+					{"account": id_account + 1000, "type_operation": 1, "value_operation": 10},
+					{"account": id_account, "type_operation": 3, "value_operation": 10}]
+	url = reverse("accounts-list")
+	response = client.post(path=url + "bulk-operations/", data=input_data, format="json")
+	response_json = response.json()
+	logging.info("Bulk operations testing ...")
+	assert response.status_code == 200
+	assert response_json["succeeded"] == 2
+	assert response_json["failed"] == 3
+	assert [result["status"] for result in response_json["results"]] == ["Success", "Success", "Failed", "Failed", "Failed"]
+	assert response_json["results"][1]["balance_after_operation"] == "70.00"
+	assert response_json["results"][2]["error"] == {"message": "Free balance out of limit!"}
+	assert response_json["results"][3]["error"] == {"message": "Account does not exist."}
+	response = client.get(path=reverse("accounts-detail", kwargs={"pk": id_account}))
+	assert response.json()["balance"] == "70.00"
+	assert response.json()["free_balance"] == "1070.00"
+	# Invalid items fail one by one, the rest of list is posted
+	input_data = [
+					{"account": id_account, "type_operation": "", "value_operation": 10},
+					{"account": id_account, "type_operation": 1, "value_operation": "6000000000.00"},
+					{"account": id_account, "type_operation": 1, "value_operation": "6000000000.00"},
+					{"account": id_account, "type_operation": 1, "value_operation": 5}]
+	response = client.post(path=url + "bulk-operations/", data=input_data, format="json")
+	response_json = response.json()
+	assert response.status_code == 200
+	assert [result["status"] for result in response_json["results"]] == ["Failed", "Success", "Failed", "Success"]
+	assert response_json["results"][2]["error"] == {"message": "Balance out of range!"}
+	settings.BULK_OPERATIONS_LIMIT = 3
+	response = client.post(path=url + "bulk-operations/", data=input_data, format="json")
+	assert response.status_code == 400
+	assert response.json() == {"message": "List can contain at most 3 operations."}
+	logging.info("Bulk operations testing finished.")
+
+
+def sub_test_operations_pagination(client):
+	id_account = int(os.environ["ACCOUNT_ID"])
+	input_data = [{"account": id_account, "type_operation": 1, "value_operation": value} for value in range(1, 8)]
+	client.post(path=reverse("accounts-list") + "bulk-operations/", data=input_data, format="json")
+	url = reverse("accounts-detail", kwargs={"pk": id_account})
+	logging.info("Operations pagination testing ...")
+	response = client.get(path=url + "operations/", data={"limit": 3})
+	response_json = response.json()
+	assert response.status_code == 200
+	assert response_json["previous"] is None
+	assert response_json["count"] == 7
+	values = [result["value_operation"] for result in response_json["results"]]
+	while response_json["next"] is not None:
+		response_json = client.get(path=response_json["next"]).json()
+		values += [result["value_operation"] for result in response_json["results"]]
+	assert values == ["7.00", "6.00", "5.00", "4.00", "3.00", "2.00", "1.00"]
+	response_json = client.get(path=response_json["previous"]).json()
+	assert [result["value_operation"] for result in response_json["results"]] == ["4.00", "3.00", "2.00"]
+	response = client.get(path=url + "operations/", data={"cursor": "invalid"})
+	assert response.status_code == 400
+	response = client.get(path=reverse("monitorings-list"), data={"cursor": "invalid"})
+	assert response.status_code == 400
+	assert response.json() == {"cursor": "Invalid cursor"}
+	logging.info("Operations pagination testing finished.")
+
+
 def sub_test_interest_counting(client, result):
 	url = reverse("accounts-list")
 	response = client.post(path=url + "interest/")
 	response_json = response.json()
 	logging.info("Interest operation testing ...")
 	assert response.status_code == 200
-	assert response_json == result
+	assert response_json["message"] == result["message"]
+	assert response_json.get("accounts", 0) == result.get("accounts", 0)
 	logging.info("Interest operation testing finished.")
 
 
+def sub_test_get_interest_operation(client):
+	id_account = os.environ["ACCOUNT_ID"]
+	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
+	response = client.get(path=url + "operations/")
+	response_json = response.json()["results"][0]
+	logging.info("Interest operation history testing ...")
+	assert response.status_code == 200
+	assert response_json["type_operation"] == "Interest"
+	assert response_json["value_operation"] == "1.25"
+	assert response_json["balance_after_operation"] == "101.25"
+	response = client.get(path=url)
+	assert response.json()["balance"] == "101.25"
+	assert response.json()["free_balance"] == "1101.25"
+	logging.info("Interest operation history testing finished.")
+
+
+def sub_test_get_balance_snapshots(client):
+	id_account = os.environ["ACCOUNT_ID"]
+	url = reverse("accounts-detail", kwargs={"pk": int(id_account)})
+	today = timezone.localdate()
+	yesterday = today - datetime.timedelta(days=1)
+	logging.info("Balance snapshots testing ...")
+	response = client.get(path=url + "balance/")
+	assert response.status_code == 200
+	assert response.json()["balance"] == "101.25"
+	response = client.get(path=url + "balance/", data={"date": yesterday.isoformat()})
+	assert response.json()["balance"] == "0.00"
+	response = client.get(path=url + "balances/", data={"date_from": yesterday.isoformat(), "date_to": today.isoformat()})
+	assert response.status_code == 200
+	assert response.json()["results"] == [
+											{"date": yesterday.isoformat(), "balance": "0.00"},
+											{"date": today.isoformat(), "balance": "101.25"}]
+	response = client.get(path=url + "balances/", data={"date_from": today.isoformat(), "date_to": yesterday.isoformat()})
+	assert response.status_code == 400
+	call_command("backfillsnapshots", account=[int(id_account)])
+	response = client.get(path=url + "balance/")
+	assert response.json()["balance"] == "101.25"
+	logging.info("Balance snapshots testing finished.")
+
+
 def sub_test_deletion_media_files(list_of_files):
 	logging.info("Deletion files operation testing ...")
 	for file in list_of_files:
@@ -250,9 +450,26 @@ def test_flow_basic(
 	sub_test_create_account(client_test, data_test_create_account)
 	sub_test_update_account(client_test, data_test_update_account)
 	sub_test_generate_iban_account(client_test)
+	sub_test_get_logs(client_test)
 	logging.info("STOP - standard flow")
 
 
+def test_scenario_generate_bulk_iban(
+					client_test,
+					data_test_create_customer,
+					data_test_create_accounttype,
+					data_test_create_account):
+	logging.info("START - scenario bulk IBAN")
+	sub_test_create_customer(client_test, data_test_create_customer)
+	sub_test_create_accounttype(client_test, data_test_create_accounttype)
+	sub_test_create_account(client_test, dict(data_test_create_account))
+	sub_test_create_account(client_test, dict(data_test_create_account))
+	sub_test_generate_bulk_iban_account(client_test, {"message": "IBAN number for 2 account(s) has been generated.", "generated": 2})
+	sub_test_generate_bulk_iban_account(client_test, {"message": "No accounts without IBAN number."})
+	logging.info("STOP - scenario bulk IBAN")
+
+
+@pytest.mark.budget(queries=8, path="/api/account/")
 def test_scenario_deposit(
 					client_test,
 					data_test_create_customer,
@@ -265,9 +482,12 @@ def test_scenario_deposit(
 	sub_test_create_account(client_test, data_test_create_account)
 	sub_test_deposit_account(client_test, data_test_deposit_account)
 	sub_test_get_deposit_operation(client_test)
+	sub_test_export_operations(client_test)
+	sub_test_conditional_get(client_test, data_test_deposit_account)
 	logging.info("STOP - scenario deposit")
 
 
+@pytest.mark.budget(queries=8, path="/api/account/")
 def test_scenario_withdrawal(
 					client_test,
 					data_test_create_customer,
@@ -279,10 +499,42 @@ def test_scenario_withdrawal(
 	sub_test_create_accounttype(client_test, data_test_create_accounttype)
 	sub_test_create_account(client_test, data_test_create_account)
 	sub_test_withdrawal_account(client_test, data_test_withdrawal_account)
+	sub_test_withdrawal_over_limit_account(client_test)
 	sub_test_get_withdrawal_operation(client_test)
 	logging.info("STOP - scenario withdrawal")
 
 
+@pytest.mark.budget(queries=7, path="/api/account/bulk-operations/")
+def test_scenario_bulk_operations(
+					settings,
+					client_test,
+					data_test_create_customer,
+					data_test_create_accounttype,
+					data_test_create_account):
+	logging.info("START - scenario bulk operations")
+	sub_test_create_customer(client_test, data_test_create_customer)
+	sub_test_create_accounttype(client_test, data_test_create_accounttype)
+	sub_test_create_account(client_test, data_test_create_account)
+	sub_test_bulk_operations_account(client_test, settings)
+	logging.info("STOP - scenario bulk operations")
+
+
+@pytest.mark.budget(queries=8, path="/api/account/")
+def test_scenario_operations_pagination(
+					client_test,
+					data_test_create_customer,
+					data_test_create_accounttype,
+					data_test_create_account):
+	logging.info("START - scenario operations pagination")
+	sub_test_create_customer(client_test, data_test_create_customer)
+	sub_test_create_accounttype(client_test, data_test_create_accounttype)
+	sub_test_create_account(client_test, data_test_create_account)
+	sub_test_operations_pagination(client_test)
+	logging.info("STOP - scenario operations pagination")
+
+
+@pytest.mark.budget(queries=8, path="/api/account/")
+@pytest.mark.budget(queries=11, duration=1.0, path="/api/account/interest/")
 def test_scenario_interest_counting(
 					client_test,
 					data_test_create_customer,
@@ -295,7 +547,11 @@ def test_scenario_interest_counting(
 	sub_test_create_account(client_test, data_test_create_account)
 	sub_test_interest_counting(client_test, {"message": "No accounts to be recounted."})
 	sub_test_deposit_account(client_test, data_test_deposit_account)
-	sub_test_interest_counting(client_test, {"message": "Interest for 1 account(s) has been recounted."})
+	sub_test_interest_counting(client_test, {"message": "Interest for 1 account(s) has been recounted.", "accounts": 1})
+	sub_test_get_interest_operation(client_test)
+	sub_test_interest_counting(client_test, {"message": "No accounts to be recounted."})
+	sub_test_get_interest_operation(client_test)
+	sub_test_get_balance_snapshots(client_test)
 	logging.info("START - scenario interest")
 
 
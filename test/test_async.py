@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from asgiref.sync import async_to_sync
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient
+from django.urls import reverse
+
+
+def get_content(client, url, data=None):
+	cache.clear()
+	response = client.get(path=url, data=data)
+	assert response.status_code == 200
+	return response
+
+
+# Test to be performed.
+def test_async_views(client_test, data_test_seeded):
+	logging.info("START - asynchronous read endpoints")
+	pk = data_test_seeded["accounts"][0].id_account
+	variants = [
+				(reverse("accounts-detail", kwargs={"pk": pk}), reverse("async-accounts-detail", kwargs={"pk": pk}), None),
+				(reverse("accounts-detail", kwargs={"pk": pk}) + "operations/", reverse("async-accounts-operations", kwargs={"pk": pk}), {"limit": 3}),
+				(reverse("monitorings-list"), reverse("async-monitorings-list"), {"limit": 20, "ordering": "-date_log"})]
+	for sync_url, async_url, data in variants:
+		sync_response = get_content(client_test, sync_url, data)
+		async_response = get_content(client_test, async_url, data)
+		# Links of pages lead to the same kind of endpoint
+		assert async_response.content.replace(async_url.encode(), sync_url.encode()) == sync_response.content
+		if data:
+			sync_response = get_content(client_test, sync_response.json()["next"])
+			async_response = get_content(client_test, async_response.json()["next"])
+			assert async_response.content.replace(async_url.encode(), sync_url.encode()) == sync_response.content
+	response = client_test.get(reverse("async-accounts-detail", kwargs={"pk": 999999}))
+	assert response.status_code == 404
+	assert response.json() == {"detail": "No AccountModel matches the given query."}
+	response = APIClient().get(reverse("async-monitorings-list"))
+	assert response.status_code == 401
+	assert response["WWW-Authenticate"] == 'Basic realm="api"'
+	logging.info("STOP - asynchronous read endpoints")
+
+
+def test_async_views_asgi(client_test, data_test_seeded, settings, caplog):
+	logging.info("START - asynchronous read endpoints served by ASGI handler")
+	# Synchronous middleware would hold thread for whole request, Django logs every adaptation in debug mode
+	settings.DEBUG = True
+	with caplog.at_level(logging.DEBUG, logger="django.request"):
+		ASGIHandler()
+	settings.DEBUG = False
+	assert not [record.getMessage() for record in caplog.records if "adapted" in record.getMessage()]
+	token = Token.objects.create(user=User.objects.get(username="test_user"))
+	headers = {"authorization": f"Token {token.key}"}
+	pk = data_test_seeded["accounts"][0].id_account
+	variants = [
+				(reverse("accounts-detail", kwargs={"pk": pk}), reverse("async-accounts-detail", kwargs={"pk": pk}), None),
+				(reverse("monitorings-list"), reverse("async-monitorings-list"), {"limit": 20, "ordering": "-date_log"})]
+	for sync_url, async_url, data in variants:
+		sync_response = get_content(client_test, sync_url, data)
+		cache.clear()
+		async_response = async_to_sync(AsyncClient().get)(async_url, data=data, headers=headers)
+		assert async_response.status_code == 200
+		assert async_response.content.replace(async_url.encode(), sync_url.encode()) == sync_response.content
+	response = async_to_sync(AsyncClient().get)(reverse("async-accounts-detail", kwargs={"pk": 999999}), headers=headers)
+	assert response.status_code == 404
+	logging.info("STOP - asynchronous read endpoints served by ASGI handler")
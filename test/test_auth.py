@@ -1,9 +1,18 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+import base64
 import logging
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.authentication import BasicAuthentication
+from django.core.cache import cache
+from userapp.authentication import CachedBasicAuthenticationClass, token_cache
+from rest_framework.authtoken.models import Token
 
 
 def sub_test_register(client, input_data):
@@ -65,3 +74,69 @@ def test_auth(
     sub_test_change_password(client_test, data_test_change_password)
     sub_test_logout(client_test)
     logging.info("STOP - authentication testing")
+
+
+def get_token_queries(client):
+	with CaptureQueriesContext(connection) as context:
+		response = client.get(reverse("accounttypes-list"))
+	return response.status_code, [query["sql"] for query in context.captured_queries if "authtoken_token" in query["sql"]]
+
+
+def test_auth_token_cache(data_test_register, data_test_change_password):
+	logging.info("START - cached token authentication")
+	user = User(username=data_test_register["username"])
+	user.set_password(data_test_register["password"])
+	user.save()
+	token = Token.objects.create(user=user).key
+	client = APIClient()
+	client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+	assert get_token_queries(client)[0] == 200
+	assert get_token_queries(client) == (200, [])
+	# Other worker has no local copy, it loads user by id kept in redis
+	token_cache.data.clear()
+	assert get_token_queries(client) == (200, [])
+	cache_key = token_cache.get_key(token)
+	assert cache.get(f"{cache_key}:user_id") == user.pk and cache.get(f"{cache_key}:user") is None
+	response = client.put(reverse("change-password"), data=data_test_change_password, format="json")
+	assert response.status_code == 200
+	status_code, queries = get_token_queries(client)
+	assert status_code == 200 and len(queries) == 1
+	user.refresh_from_db()
+	user.is_active = False
+	user.save()
+	assert get_token_queries(client)[0] == 401
+	user.is_active = True
+	user.save()
+	assert get_token_queries(client)[0] == 200
+	assert client.delete(reverse("logout")).status_code == 200
+	assert not Token.objects.filter(key=token).exists()
+	assert get_token_queries(client)[0] == 401
+	logging.info("STOP - cached token authentication")
+
+
+def get_cpu_per_request(authentication, request, requests=5):
+	start = time.process_time()
+	for _ in range(requests):
+		user, _ = authentication.authenticate(request)
+	return user, (time.process_time() - start) / requests
+
+
+def test_auth_basic_cache(data_test_login):
+	logging.info("START - cached basic authentication")
+	user = User(username=data_test_login["username"])
+	user.set_password(data_test_login["password"])
+	user.save()
+	credentials = base64.b64encode(f"{data_test_login['username']}:{data_test_login['password']}".encode("utf-8")).decode("ascii")
+	request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Basic {credentials}")
+	_, cpu_before = get_cpu_per_request(BasicAuthentication(), request)
+	CachedBasicAuthenticationClass().authenticate(request)
+	authenticated_user, cpu_after = get_cpu_per_request(CachedBasicAuthenticationClass(), request)
+	assert authenticated_user == user
+	logging.info(f"CPU per request: basic {cpu_before * 1000:.2f}ms, cached basic {cpu_after * 1000:.2f}ms")
+	assert cpu_after * 5 < cpu_before
+	user.set_password("pass200@test")
+	user.save()
+	client = APIClient()
+	client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+	assert client.get(reverse("accounttypes-list")).status_code == 401
+	logging.info("STOP - cached basic authentication")
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pytest
+from apibankapp.benchmark import BenchmarkClass
+
+
+# Test to be performed.
+@pytest.mark.django_db(transaction=True)
+def test_benchmark():
+	logging.info("START - benchmark report")
+	scenarios = ["login", "account_list", "account_retrieve", "operations", "export", "newoperation"]
+	benchmark = BenchmarkClass(customers=5, accounts=20, operations=200, requests=6, concurrency=2, scenarios=scenarios)
+	report = benchmark.run()
+	assert report["meta"]["accounts"] == 20
+	assert list(report["scenarios"]) == scenarios
+	for result in report["scenarios"].values():
+		assert result["requests"] == 6
+		assert result["errors"] == 0
+		assert result["latency_ms"]["p50"] <= result["latency_ms"]["p95"] <= result["latency_ms"]["p99"] <= result["latency_ms"]["max"]
+		assert result["queries"]["max"] > 0
+	assert report["scenarios"]["newoperation"]["concurrency"] == 1
+	logging.info("STOP - benchmark report")
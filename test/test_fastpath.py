@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import time
+import logging
+from django.urls import reverse
+from django.core.cache import cache
+from django.test import RequestFactory
+from apibankapp.models import CustomerModel, AccountModel, OperationModel, LogModel
+from apibankapp.serializers import FastSerializerClass, AccountLRDSerializer, OperationHistorySerializer, LogMonitoringSerializer
+
+
+def get_pages(client_test, url, data):
+	pages = list()
+	while url:
+		cache.clear()
+		response = client_test.get(path=url, data=data)
+		assert response.status_code == 200
+		pages.append(response.content)
+		url, data = response.json()["next"], None
+	return pages
+
+
+# Test to be performed.
+def test_fast_read_identical(client_test, data_test_seeded, settings):
+	logging.info("START - fast read path returns identical content")
+	CustomerModel.objects.filter(id_customer=data_test_seeded["customers"][0].id_customer).update(avatar="image/avatars/test.jpg")
+	AccountModel.objects.filter(id_account=data_test_seeded["accounts"][0].id_account).update(number_iban="PL12345678901234567890123456")
+	account_url = reverse("accounts-detail", kwargs={"pk": data_test_seeded["accounts"][0].id_account})
+	variants = [
+				(reverse("accounts-list"), {"limit": 50}),
+				(account_url + "operations/", {"limit": 3}),
+				(reverse("monitorings-list"), {"limit": 50}),
+				(reverse("monitorings-list"), {"limit": 50, "ordering": "-date_log"})]
+	for url, data in variants:
+		settings.FAST_READ = False
+		expected = get_pages(client_test, url, data)
+		settings.FAST_READ = True
+		assert get_pages(client_test, url, data) == expected
+	logging.info("STOP - fast read path returns identical content")
+
+
+def test_fast_read_speedup(data_test_seeded):
+	logging.info("START - fast read path speedup")
+	request = RequestFactory().get("/")
+	for serializer_class, queryset in [
+										(AccountLRDSerializer, AccountModel.objects.select_related("account_type", "customer")),
+										(OperationHistorySerializer, OperationModel.objects.all()),
+										(LogMonitoringSerializer, LogModel.objects.all())]:
+		queryset = queryset.order_by("pk")[:1000]
+		start = time.perf_counter()
+		data = serializer_class(list(queryset), context={"request": request}, many=True).data
+		duration = time.perf_counter() - start
+		fast_serializer = FastSerializerClass(serializer_class)
+		start = time.perf_counter()
+		fast_data = fast_serializer.to_representation(list(fast_serializer.get_queryset(queryset)), {"request": request})
+		fast_duration = time.perf_counter() - start
+		assert fast_data == data
+		logging.info(f"{serializer_class.__name__}: {len(data)} rows, serializer {duration:.4f}s, fast read {fast_duration:.4f}s, speedup {duration / fast_duration:.1f}x")
+	logging.info("STOP - fast read path speedup")
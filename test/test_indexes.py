@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from apibankapp.filters import CustomerFilter, LogFilter
+from apibankapp.models import CustomerModel, AccountModel, OperationModel, LogModel
+
+
+@pytest.fixture()
+def data_test_analyzed(data_test_seeded):
+	with connection.cursor() as cursor:
+		cursor.execute("ANALYZE")
+		if connection.vendor == "postgresql":
+			cursor.execute("SET LOCAL enable_seqscan = off")
+	return data_test_seeded["accounts"]
+
+
+def assert_index_used(queryset, *index_names):
+	plan = queryset.explain()
+	logging.info(plan)
+	assert any(index_name in plan for index_name in index_names)
+
+
+# Test to be performed.
+def test_index_operations_history(data_test_analyzed):
+	logging.info("START - index for operations history")
+	queryset = OperationModel.objects.filter(id_account=data_test_analyzed[0].id_account).order_by("-operation_date", "-id_operation")[:5]
+	assert_index_used(queryset, "operation_account_date_idx")
+	logging.info("STOP - index for operations history")
+
+
+def test_index_interest(data_test_analyzed):
+	logging.info("START - index for interest")
+	not_credited = Q(last_interest_date__isnull=True) | Q(last_interest_date__lt=timezone.localdate())
+	queryset = AccountModel.objects.filter(not_credited, id_account__gt=0, balance__gt=0, percent__gt=0).order_by("id_account").values_list("id_account", flat=True)[:500]
+	assert_index_used(queryset, "account_interest_idx")
+	logging.info("STOP - index for interest")
+
+
+def test_index_logs(data_test_analyzed):
+	logging.info("START - index for logs")
+	# Monthly partitions of PostgreSQL have own indexes named after columns
+	assert_index_used(LogModel.objects.order_by("-date_log", "-id_log")[:5], "log_date_idx", "date_log_id_log_idx")
+	assert_index_used(LogModel.objects.order_by("-duration_log", "-id_log")[:5], "log_duration_idx", "duration_log_id_log_idx")
+	queryset = LogFilter(data={"date_log": timezone.localdate().isoformat()}, queryset=LogModel.objects.all()).qs
+	assert_index_used(queryset.order_by("-date_log", "-id_log")[:5], "log_date_idx", "date_log_id_log_idx")
+	logging.info("STOP - index for logs")
+
+
+def test_index_customer_search(data_test_analyzed):
+	logging.info("START - index for customer search")
+	if connection.vendor != "postgresql":
+		pytest.skip("Expression indexes for case-insensitive search are used by PostgreSQL only.")
+	queryset = CustomerFilter(data={"pesel": "89071203452"}, queryset=CustomerModel.objects.all()).qs
+	assert_index_used(queryset, "customer_pesel_idx")
+	queryset = CustomerFilter(data={"identification": "abx9234"}, queryset=CustomerModel.objects.all()).qs
+	assert_index_used(queryset, "customer_identification_idx")
+	logging.info("STOP - index for customer search")
+
+
+def test_customer_search_and_exact_filters(client_test, data_test_seeded):
+	logging.info("START - customer search and exact filters")
+	url = reverse("customers-list")
+	# Search matches parts of values
+	response = client_test.get(url, data={"search": "1203456"})
+	assert [customer["pesel"] for customer in response.json()["results"]] == ["89071203456"]
+	response = client_test.get(url, data={"search": "bx92"})
+	assert response.json()["count"] == 12
+	response = client_test.get(url, data={"pesel": "89071203452"})
+	assert [customer["pesel"] for customer in response.json()["results"]] == ["89071203452"]
+	response = client_test.get(url, data={"identification": "abx9234"})
+	assert response.json()["count"] == 12
+	response = client_test.get(url, data={"pesel": "8907120345"})
+	assert response.json()["count"] == 0
+	logging.info("STOP - customer search and exact filters")
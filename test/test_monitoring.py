@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import queue
+import logging
+import datetime
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework.authtoken.models import Token
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.db import connection
+from django.urls import reverse
+from django.core.management import call_command
+from django.utils import timezone
+from apibankapp.models import LogModel, LogRollupModel
+from apibankapp.monitoring import LogWriterClass
+from apibankapp.metrics import metrics
+from apibankapp.functions import rollup_pending_logs
+
+
+def data_test_log(action):
+	return {
+			"action_log": action,
+			"function_log": "AccountViewSet",
+			"duration_log": 0.125,
+			"data_log": "{}",
+			"user_log": "test_user",
+			"status_log": "Success"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_log_writer_async(settings):
+	logging.info("START - asynchronous log writer")
+	settings.LOG_MONITORING = {**settings.LOG_MONITORING, "ASYNC": True, "QUEUE_SIZE": 100}
+	log_writer = LogWriterClass()
+	for action in ["create", "update", "destroy"]:
+		log_writer.write(data_test_log(action))
+	log_writer.stop()
+	assert sorted(LogModel.objects.values_list("action_log", flat=True)) == ["create", "destroy", "update"]
+	assert log_writer.get_counters() == {"queued": 3, "written": 3, "dropped": 0, "failed": 0, "pending": 0}
+	logging.info("STOP - asynchronous log writer")
+
+
+def test_log_writer_queue_full(settings, monkeypatch):
+	logging.info("START - log writer with full queue")
+	settings.LOG_MONITORING = {**settings.LOG_MONITORING, "ASYNC": True}
+	log_writer = LogWriterClass()
+	log_writer.pid = os.getpid()
+	log_writer.queue = queue.Queue(maxsize=1)
+	monkeypatch.setattr(log_writer, "start", lambda: None)
+	written = timezone.now()
+	for action in ["create", "update"]:
+		log_writer.write(data_test_log(action))
+	assert log_writer.get_counters()["dropped"] == 1
+	monkeypatch.setattr(timezone, "now", lambda: written + datetime.timedelta(minutes=5))
+	log_writer.flush()
+	assert LogModel.objects.count() == 1
+	assert LogModel.objects.get().date_log - written < datetime.timedelta(minutes=1)
+	logging.info("STOP - log writer with full queue")
+
+
+def test_log_rollup_and_retention():
+	logging.info("START - log rollups and retention")
+	now = timezone.now().replace(minute=30, second=0, microsecond=0)
+	old = now - datetime.timedelta(days=120)
+	for date_log, duration in [(old, "0.004"), (old, "0.300"), (old, "3.000"), (now, "0.020")]:
+		log = LogModel.objects.create(**{**data_test_log("create"), "duration_log": duration})
+		LogModel.objects.filter(id_log=log.id_log).update(date_log=date_log)
+	assert rollup_pending_logs() == 2
+	rollup = LogRollupModel.objects.get(hour=old.replace(minute=0))
+	assert rollup.count == 3
+	assert str(rollup.duration_max) == "3.000000"
+	assert rollup.duration_buckets == [1, 1, 1, 1, 1, 1, 2, 2, 2, 3, 3]
+	LogModel.objects.create(**data_test_log("update"))
+	assert rollup_pending_logs() == 2
+	assert LogRollupModel.objects.filter(action_log="update").count() == 1
+	call_command("prunelogs", months=1)
+	assert list(LogModel.objects.values_list("date_log", flat=True).order_by("date_log"))[0] > old
+	assert LogModel.objects.count() == 2
+	assert LogRollupModel.objects.filter(hour=old.replace(minute=0)).get().count == 3
+	logging.info("STOP - log rollups and retention")
+
+
+def test_log_stats(client_test, monkeypatch):
+	logging.info("START - statistics of logs")
+	earlier = timezone.now() - datetime.timedelta(hours=2)
+	for number in range(8):
+		log = LogModel.objects.create(**{**data_test_log("create"), "duration_log": "0.020"})
+		if number < 4:
+			LogModel.objects.filter(id_log=log.id_log).update(date_log=earlier)
+	rollup_pending_logs()
+	for _ in range(2):
+		LogModel.objects.create(**{**data_test_log("create"), "duration_log": 0, "status_log": "Failed"})
+	LogModel.objects.create(**{**data_test_log("update"), "duration_log": "4.000"})
+	response = client_test.get(reverse("monitorings-list") + "stats/")
+	assert response.status_code == 200
+	response_json = response.json()
+	assert response_json["method"] == "histogram"
+	assert response_json["results"] == [
+										{
+											"action": "create", "function": "AccountViewSet", "count": 10, "errors": 2, "error_rate": 0.2,
+											"p50": 0.015625, "p95": 0.02, "p99": 0.02, "max": 0.02},
+										{
+											"action": "update", "function": "AccountViewSet", "count": 1, "errors": 0, "error_rate": 0,
+											"p50": 3.75, "p95": 4.0, "p99": 4.0, "max": 4.0}]
+	date_from = (timezone.now() - datetime.timedelta(hours=1)).isoformat()
+	response = client_test.get(reverse("monitorings-list") + "stats/", data={"date_from": date_from})
+	assert response.json()["results"][0]["count"] == 6
+	response = client_test.get(reverse("monitorings-list") + "stats/", data={"date_from": timezone.now().isoformat(), "date_to": earlier.isoformat()})
+	assert response.status_code == 400
+	# Window older than remaining logs is answered from rollups even where exact percentiles are available
+	LogModel.objects.filter(date_log__lt=timezone.now() - datetime.timedelta(hours=1)).delete()
+	monkeypatch.setattr(connection, "vendor", "postgresql")
+	date_to = (timezone.now() - datetime.timedelta(hours=1)).isoformat()
+	response = client_test.get(reverse("monitorings-list") + "stats/", data={"date_from": (earlier - datetime.timedelta(hours=1)).isoformat(), "date_to": date_to})
+	assert response.json()["method"] == "histogram"
+	assert response.json()["results"][0]["count"] == 4
+	logging.info("STOP - statistics of logs")
+
+
+def test_log_stats_partial_hours(client_test):
+	logging.info("START - statistics of logs in partial hours")
+	hour = timezone.now().replace(minute=0, second=0, microsecond=0) - datetime.timedelta(hours=3)
+	for minutes, logs in [(10, 2), (40, 3)]:
+		for _ in range(logs):
+			log = LogModel.objects.create(**data_test_log("create"))
+			LogModel.objects.filter(id_log=log.id_log).update(date_log=hour + datetime.timedelta(minutes=minutes))
+	LogModel.objects.create(**data_test_log("create"))
+	rollup_pending_logs()
+	# Hours cut by window are counted from logs, not from whole rollup
+	for date_from, date_to, count in [
+										(hour + datetime.timedelta(minutes=30), hour + datetime.timedelta(hours=2), 3),
+										(hour - datetime.timedelta(hours=1), hour + datetime.timedelta(minutes=30), 2),
+										(hour - datetime.timedelta(hours=1), hour + datetime.timedelta(hours=1), 5)]:
+		response = client_test.get(reverse("monitorings-list") + "stats/", data={"date_from": date_from.isoformat(), "date_to": date_to.isoformat()})
+		assert response.json()["method"] == "histogram"
+		assert response.json()["results"][0]["count"] == count
+	logging.info("STOP - statistics of logs in partial hours")
+
+
+def test_action_metrics(client_test, settings, tmp_path):
+	logging.info("START - metrics of monitored actions")
+	settings.METRICS = {"DIR": str(tmp_path), "FLUSH_INTERVAL": 60}
+	metrics.reset()
+	# Histograms of other worker are saved in the same directory
+	other_worker = {
+						"series": [{
+										"labels": ["AccountViewSet", "create", "Failed"],
+										"series": {name: {"buckets": [1] + [0] * (size - 1), "sum": 0.001} for name, size in [("duration", 12), ("db_duration", 12), ("queries", 9)]}}],
+						"counters": {"queued": 0, "written": 5, "dropped": 2, "failed": 0, "pending": 0}}
+	(tmp_path / "1-other.json").write_text(json.dumps(other_worker))
+	response = client_test.post(reverse("accounts-list") + "generate-bulk/")
+	assert response.status_code == 200
+	response = client_test.post(reverse("accounts-list"), data={}, format="json")
+	assert response.status_code == 400
+	assert LogModel.objects.get(status_log="Failed").duration_log > 0
+	response = client_test.get(reverse("monitorings-list") + "metrics/")
+	assert response.status_code == 200
+	assert response["Content-Type"].startswith("text/plain")
+	lines = response.content.decode().splitlines()
+	assert "# TYPE apibank_action_duration_seconds histogram" in lines
+	assert 'apibank_action_duration_seconds_count{function="AccountViewSet",action="generate_bulk",status="Success"} 1' in lines
+	assert 'apibank_action_duration_seconds_count{function="AccountViewSet",action="create",status="Failed"} 2' in lines
+	assert 'apibank_action_queries_bucket{function="AccountViewSet",action="generate_bulk",status="Success",le="+Inf"} 1' in lines
+	assert "apibank_log_writer_dropped_total 2" in lines
+	# Reads are measured too, not only actions with monitoring log
+	response = client_test.get(reverse("accounts-list"))
+	assert response.status_code == 200
+	lines = client_test.get(reverse("monitorings-list") + "metrics/").content.decode().splitlines()
+	assert 'apibank_action_duration_seconds_count{function="AccountViewSet",action="list",status="Success"} 1' in lines
+	assert len(list(tmp_path.glob("*.json"))) == 2
+	# Files of exited workers are merged into one aggregate
+	metrics.retire(1)
+	metrics.retire(os.getpid())
+	assert [path.name for path in tmp_path.glob("*.json")] == ["aggregate.json"]
+	metrics.reset()
+	lines = client_test.get(reverse("monitorings-list") + "metrics/").content.decode().splitlines()
+	assert 'apibank_action_duration_seconds_count{function="AccountViewSet",action="create",status="Failed"} 2' in lines
+	assert 'apibank_action_duration_seconds_count{function="AccountViewSet",action="list",status="Success"} 1' in lines
+	assert "apibank_log_writer_dropped_total 2" in lines
+	logging.info("STOP - metrics of monitored actions")
+
+
+def test_query_tracing(client_test, data_test_seeded, settings, caplog):
+	logging.info("START - tracing of queries in requests")
+	settings.SQL_TRACING = {**settings.SQL_TRACING, "SLOW_QUERY_SECONDS": 0, "SLOW_QUERIES_LIMIT": 3}
+	response = client_test.post(reverse("accounts-list") + "interest/")
+	assert response.status_code == 200
+	assert response["Server-Timing"].startswith("db;dur=")
+	log = LogModel.objects.get(action_log="interest")
+	assert log.queries_log > 0
+	assert log.db_duration_log > 0
+	assert len(log.slow_queries_log) == 3
+	assert all(set(query) == {"sql", "params", "many", "duration"} for query in log.slow_queries_log)
+	caplog.clear()
+	url = reverse("accounts-detail", kwargs={"pk": data_test_seeded["accounts"][0].id_account}) + "export/"
+	with caplog.at_level(logging.WARNING, logger="apibankapp.slowqueries"):
+		response = client_test.get(url, data={"file_format": "csv"})
+		assert not [record for record in caplog.records if record.name == "apibankapp.slowqueries"]
+		b"".join(response.streaming_content)
+	records = [json.loads(record.getMessage()) for record in caplog.records if record.name == "apibankapp.slowqueries"]
+	assert len(records) == 1
+	assert records[0]["path"] == url
+	assert records[0]["queries"] >= len(records[0]["slow_queries"]) > 0
+	# Values of parameters and literals are not written to log
+	assert "test_user" not in json.dumps(records)
+	caplog.clear()
+	token = Token.objects.create(user=User.objects.get(username="test_user"))
+	with caplog.at_level(logging.WARNING, logger="apibankapp.slowqueries"):
+		response = async_to_sync(AsyncClient().get)(reverse("async-monitorings-list"), headers={"authorization": f"Token {token.key}"})
+	assert response.status_code == 200
+	records = [json.loads(record.getMessage()) for record in caplog.records if record.name == "apibankapp.slowqueries"]
+	assert records[0]["queries"] > 0
+	assert f'desc="{records[0]["queries"]} queries"' in response["Server-Timing"]
+	logging.info("STOP - tracing of queries in requests")
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from asgiref.sync import async_to_sync
+from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from apibankapp.profiling import get_profiling_token
+
+
+def test_debug_toolbar_disabled():
+	logging.info("START - debug toolbar outside of debug mode")
+	assert settings.DEBUG is False
+	assert "debug_toolbar" not in settings.INSTALLED_APPS
+	assert "debug_toolbar.middleware.DebugToolbarMiddleware" not in settings.MIDDLEWARE
+	logging.info("STOP - debug toolbar outside of debug mode")
+
+
+def test_profiling_signed_header(client_test, settings, tmp_path):
+	logging.info("START - profiling of single request")
+	settings.PROFILING = {**settings.PROFILING, "DIR": str(tmp_path)}
+	url = reverse("monitorings-list")
+	response = client_test.get(url)
+	assert response.status_code == 200
+	assert "X-Profile-Id" not in response
+	response = client_test.get(url, HTTP_X_PROFILE="forged")
+	assert "X-Profile-Id" not in response
+	assert list(tmp_path.iterdir()) == []
+	response = client_test.get(url, HTTP_X_PROFILE=get_profiling_token())
+	assert response.status_code == 200
+	name = response["X-Profile-Id"]
+	assert sorted(path.name for path in tmp_path.iterdir()) == [f"{name}.json", f"{name}.prof"]
+	report = json.loads((tmp_path / f"{name}.json").read_text())
+	assert report["path"] == url
+	assert report["queries"] == len(report["sql"]) > 0
+	assert "function calls" in report["stats"]
+	logging.info("STOP - profiling of single request")
+
+
+def test_profiling_asgi(settings, tmp_path):
+	logging.info("START - profiling of asynchronous request")
+	settings.PROFILING = {**settings.PROFILING, "DIR": str(tmp_path)}
+	token = Token.objects.create(user=User.objects.create_superuser(username="test_user", password="test_password"))
+	headers = {"authorization": f"Token {token.key}", "x-profile": get_profiling_token()}
+	response = async_to_sync(AsyncClient().get)(reverse("async-monitorings-list"), headers=headers)
+	assert response.status_code == 200
+	report = json.loads((tmp_path / f"{response['X-Profile-Id']}.json").read_text())
+	assert report["path"] == reverse("async-monitorings-list")
+	assert report["queries"] == len(report["sql"]) > 0
+	logging.info("STOP - profiling of asynchronous request")
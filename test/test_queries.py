@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pytest
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# Test to be performed.
+def test_queries_customers(assert_constant_queries, data_test_seeded):
+	logging.info("START - queries for customers")
+	url = reverse("customers-list")
+	assert_constant_queries([(url, {"limit": 1}), (url, {"limit": 10})])
+	customer_with_accounts = data_test_seeded["customers"][0]
+	customer_without_accounts = data_test_seeded["customers"][-1]
+	assert customer_with_accounts.customer_accounts.count() > 1
+	assert not customer_without_accounts.customer_accounts.exists()
+	assert_constant_queries([
+								(reverse("customers-detail", kwargs={"pk": customer_with_accounts.id_customer}), None),
+								(reverse("customers-detail", kwargs={"pk": customer_without_accounts.id_customer}), None)])
+	logging.info("STOP - queries for customers")
+
+
+@pytest.mark.budget(queries=4, duration=0.5, path="/api/account/")
+def test_queries_accounts(assert_constant_queries, data_test_seeded):
+	logging.info("START - queries for accounts")
+	url = reverse("accounts-list")
+	assert_constant_queries([(url, {"limit": 1}), (url, {"limit": 10})])
+	url = reverse("accounts-detail", kwargs={"pk": data_test_seeded["accounts"][0].id_account})
+	assert_constant_queries([(url + "operations/", {"limit": 1}), (url + "operations/", {"limit": 10})])
+	logging.info("STOP - queries for accounts")
+
+
+def test_queries_logs(assert_constant_queries, data_test_seeded):
+	logging.info("START - queries for logs")
+	url = reverse("monitorings-list")
+	assert_constant_queries([(url, {"limit": 1}), (url, {"limit": 10})])
+	logging.info("STOP - queries for logs")
+
+
+def test_queries_reference_data(client_test, data_test_seeded):
+	logging.info("START - queries for reference data")
+	accounts = data_test_seeded["accounts"]
+	client_test.post(path=reverse("accounts-detail", kwargs={"pk": accounts[0].id_account}) + "generate/")
+	with CaptureQueriesContext(connection) as context:
+		response = client_test.post(path=reverse("accounts-detail", kwargs={"pk": accounts[1].id_account}) + "generate/")
+	assert response.status_code == 200
+	assert len(response.json()["number_iban"]) == 28
+	for query in context.captured_queries:
+		assert 'FROM "apibankapp_parametermodel"' not in query["sql"]
+		assert 'FROM "apibankapp_accounttypemodel"' not in query["sql"]
+	url = reverse("accounttypes-detail", kwargs={"pk": accounts[2].account_type_id})
+	client_test.put(path=url, data={"description": "Standard account", "subaccount": "037540", "percent": 7.55}, format="json")
+	response = client_test.post(path=reverse("accounts-detail", kwargs={"pk": accounts[2].id_account}) + "generate/")
+	assert response.json()["number_iban"][10:16] == "037540"
+	logging.info("STOP - queries for reference data")
+
+
+def test_queries_response_cache(client_test, data_test_seeded):
+	logging.info("START - queries for cached responses")
+	account = data_test_seeded["accounts"][1]
+	url = reverse("accounts-detail", kwargs={"pk": account.id_account})
+	response = client_test.get(path=url)
+	assert response.json()["balance"] == "1.00"
+	with CaptureQueriesContext(connection) as context:
+		response = client_test.get(path=url)
+	assert response.json()["balance"] == "1.00"
+	# Only version of account for ETag is read
+	assert len(context.captured_queries) == 1
+	client_test.post(path=url + "newoperation/", data={"type_operation": 1, "value_operation": 10}, format="json")
+	assert client_test.get(path=url).json()["balance"] == "11.00"
+	client_test.post(path=reverse("accounts-list") + "bulk-operations/", data=[{"account": account.id_account, "type_operation": 1, "value_operation": 5}], format="json")
+	assert client_test.get(path=url).json()["balance"] == "16.00"
+	customer_url = reverse("customers-detail", kwargs={"pk": account.customer_id})
+	input_data = {key: value for key, value in client_test.get(path=customer_url).json().items() if key != "avatar"}
+	response = client_test.put(path=customer_url, data={**input_data, "first_name": "Arnold"}, format="json")
+	assert response.status_code == 200
+	assert client_test.get(path=url).json()["customer"]["first_name"] == "Arnold"
+	logging.info("STOP - queries for cached responses")
+
+
+@pytest.mark.budget(queries=1, path="/api/customer/")
+def test_queries_budget(client_test, data_test_seeded):
+	logging.info("START - budget of queries")
+	with pytest.raises(pytest.fail.Exception, match="exceeded budget"):
+		client_test.get(path=reverse("customers-list"))
+	assert len(client_test.records[-1]["queries"]) > 1
+	response = client_test.get(path=reverse("accounts-list"))
+	assert response.status_code == 200
+	logging.info("STOP - budget of queries")
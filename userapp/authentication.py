@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import hmac
+import time
+import hashlib
+import threading
+from uuid import uuid4
+from collections import OrderedDict
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.utils.crypto import constant_time_compare
+from django.db import transaction
+
+
+class TokenCacheClass:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    def get_key(self, key):
+        return f"auth:token:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    # Redis keeps only version and id of user, worker keeps user and checks only version on every request
+    def get(self, key):
+        cache_key = self.get_key(key)
+        entry = cache.get_many([f"{cache_key}:version", f"{cache_key}:user_id"])
+        version, user_id = entry.get(f"{cache_key}:version"), entry.get(f"{cache_key}:user_id")
+        if version is None or user_id is None:
+            return None
+        with self.lock:
+            entry = self.data.get(cache_key)
+            if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+                self.data.move_to_end(cache_key)
+                return entry[2]
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None:
+            self.store(cache_key, version, user)
+        return user
+
+    def set(self, key, user):
+        cache_key = self.get_key(key)
+        version = uuid4().hex
+        seconds = settings.AUTH_TOKEN_CACHE["SECONDS"]
+        cache.set_many({f"{cache_key}:user_id": user.pk, f"{cache_key}:version": version}, timeout=seconds)
+        self.store(cache_key, version, user)
+
+    def store(self, cache_key, version, user):
+        with self.lock:
+            self.data[cache_key] = (version, time.monotonic() + settings.AUTH_TOKEN_CACHE["LOCAL_SECONDS"], user)
+            self.data.move_to_end(cache_key)
+            while len(self.data) > settings.AUTH_TOKEN_CACHE["SIZE"]:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        cache_key = self.get_key(key)
+        cache.delete_many([f"{cache_key}:version", f"{cache_key}:user_id"])
+        with self.lock:
+            self.data.pop(cache_key, None)
+
+    # Token is removed at once and again after commit, so no request caches user read before commit
+    def invalidate(self, *keys):
+        for key in keys:
+            self.delete(key)
+            transaction.on_commit(lambda key=key: self.delete(key))
+
+    def invalidate_user(self, user_id):
+        self.invalidate(*Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+
+
+class CredentialCacheClass:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    # Only HMAC of credentials is kept, never password itself
+    def get_key(self, username, password):
+        return hmac.new(settings.SECRET_KEY.encode("utf-8"), f"{username}:{password}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, user):
+        with self.lock:
+            self.data[key] = (time.monotonic() + settings.AUTH_BASIC_CACHE["SECONDS"], user.pk, user.password)
+            self.data.move_to_end(key)
+            while len(self.data) > settings.AUTH_BASIC_CACHE["SIZE"]:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for key in [key for key, entry in self.data.items() if entry[1] == user_id]:
+                del self.data[key]
+
+
+token_cache = TokenCacheClass()
+credential_cache = CredentialCacheClass()
+
+
+class CachedTokenAuthenticationClass(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is not None and user.is_active:
+            return (user, Token(key=key, user=user))
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user)
+        return (user, token)
+
+
+class CachedBasicAuthenticationClass(BasicAuthentication):
+
+    # Verified credentials skip password hasher, stored password hash still has to be same
+    def authenticate_credentials(self, userid, password, request=None):
+        key = credential_cache.get_key(userid, password)
+        entry = credential_cache.get(key)
+        if entry is not None:
+            user = get_user_model()._default_manager.filter(pk=entry[0]).first()
+            if user is not None and user.is_active and user.get_username() == userid and constant_time_compare(user.password, entry[1]):
+                return (user, None)
+            credential_cache.delete(key)
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.set(key, user)
+        return (user, auth)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from rest_framework.authtoken.models import Token
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import token_cache, credential_cache
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_cache(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+# Password change and deactivation are saved on user, so cached token has to be dropped
+@receiver(post_save, sender=User)
+def invalidate_user_token_cache(sender, instance, created=False, **kwargs):
+    if not created:
+        token_cache.invalidate_user(instance.pk)
+        credential_cache.invalidate_user(instance.pk)